@@ -1,59 +1,180 @@
 # app.py
 
+import asyncio
 import io
 import json
 import logging
-from typing import List
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Time-to-ready (see /readyz) is measured from here, so it includes the imports below.
+STARTED_AT = time.perf_counter()
 
 # --- Core Libraries ---
 import uvicorn
 from fastapi import FastAPI, HTTPException, UploadFile, File, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # --- Haystack & Pinecone Imports ---
+from haystack import Document, Pipeline
 from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
 
 # --- Modular Imports from `src` package ---
 from src import config
-from src.data_processor import process_json_data, load_and_process_data 
-from src.pipelines import build_rag_pipeline, build_indexing_pipeline
-from src.schemas import RAGResponse, QueryRequest, UpdateResponse
+from src.data_processor import stream_documents, load_and_process_data
+from src.jobs import IndexingJob, JobManager, JobQueueFull
+from src.manifest import IndexManifest
+from src.pipelines import (
+    build_query_inputs, build_rag_pipeline, extract_rag_result, index_documents, reload_retriever_index, warm_up_rag_pipeline
+)
+from src.schemas import RAGResponse, QueryRequest, JobAcceptedResponse, JobStatusResponse
+from src.streaming import format_sse, stream_rag_answer
 
 # ======================================================================================
 # 1. INITIAL CONFIGURATION & SETUP
 # ======================================================================================
 logging.basicConfig(level=logging.INFO)
 
+# --- Global Haystack Components ---
+# Created by the lifespan handler when the server starts, not at import time,
+# so importing the app (workers, tests) never touches Pinecone or Bedrock.
+document_store: Optional[PineconeDocumentStore] = None
+RAG_PIPELINE: Optional[Pipeline] = None
+READINESS: Dict[str, Any] = {"ready": False, "error": None, "time_to_ready_seconds": None, "warm_up": None}
+
+# --- Query Workers ---
+# The pipeline is synchronous (Bedrock and Pinecone calls block), so queries run
+# on this bounded pool and the event loop stays free to accept other requests.
+QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=config.QUERY_CONCURRENCY, thread_name_prefix="query")
+logging.info(f"Serving up to {config.QUERY_CONCURRENCY} concurrent queries.")
+
+# --- Background Indexing ---
+INDEXING_JOBS = JobManager(max_concurrency=config.INDEXING_JOB_CONCURRENCY, max_pending=config.INDEXING_MAX_PENDING_JOBS)
+
+
+def initialize_services() -> None:
+    global document_store, RAG_PIPELINE
+    document_store = PineconeDocumentStore(index=config.PINECONE_INDEX_NAME)
+    RAG_PIPELINE = build_rag_pipeline(document_store)
+    logging.info("✅ Global RAG pipeline loaded.")
+
+
+def warm_up_services() -> None:
+    """Primes the pipeline (see `warm_up_rag_pipeline`) and marks the app as ready if that succeeds."""
+    try:
+        timings = warm_up_rag_pipeline(RAG_PIPELINE) if config.WARM_UP_ENABLED else {}
+    except Exception as e:
+        logging.error(f"Warm-up failed; the app will not report ready: {e}")
+        READINESS["error"] = "Warm-up failed."
+        return
+    READINESS.update(ready=True, error=None, time_to_ready_seconds=round(time.perf_counter() - STARTED_AT, 3),
+                     warm_up={step: round(seconds, 3) for step, seconds in timings.items()})
+    logging.info(f"✅ Ready to serve queries {READINESS['time_to_ready_seconds']:.2f}s after start (warm-up: {READINESS['warm_up']}).")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(QUERY_EXECUTOR, initialize_services)
+    # Warm up in the background: the server starts answering /healthz at once,
+    # and /readyz turns 200 when the warm-up has succeeded.
+    warm_up = loop.run_in_executor(QUERY_EXECUTOR, warm_up_services)
+    yield
+    await warm_up
+
+
 # --- Initialize FastAPI App ---
 app = FastAPI(
     title="CRM Support RAG API",
     description="An API for querying a RAG system and updating its knowledge base.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-# --- Global Haystack Components ---
-document_store = PineconeDocumentStore(index=config.PINECONE_INDEX_NAME)
-RAG_PIPELINE = build_rag_pipeline(document_store)
-logging.info("✅ Global RAG pipeline loaded and ready.")
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"The upload exceeds the limit of {config.MAX_UPLOAD_BYTES} bytes.")
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware that refuses oversized request bodies on `paths` before
+    the multipart form is parsed, since Starlette spools the whole body while
+    parsing it, before the endpoint runs. A body whose Content-Length exceeds
+    `config.MAX_UPLOAD_BYTES` plus `config.UPLOAD_FORM_OVERHEAD_BYTES` gets a
+    413 without being read; a body sent without one is counted as it is
+    received and cut off with a 413 once it passes that limit.
+    `spool_upload` still enforces the exact limit on the file itself.
+    """
+    def __init__(self, app, paths: List[str]):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        limit = config.MAX_UPLOAD_BYTES + config.UPLOAD_FORM_OVERHEAD_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await JSONResponse(status_code=413, content={"detail": upload_too_large().detail})(scope, receive, send)
+            return
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise upload_too_large()
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+app.add_middleware(UploadSizeLimit, paths=["/update-articles"])
+
+
+def get_rag_pipeline() -> Pipeline:
+    if RAG_PIPELINE is None:
+        raise HTTPException(status_code=503, detail="The service is starting up.")
+    return RAG_PIPELINE
 
 
 # ======================================================================================
 # 2. API ENDPOINTS
 # ======================================================================================
 
+@app.get("/healthz", summary="Liveness: the process is up and serving requests")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz", summary="Readiness: the pipeline is built and warmed up")
+async def readyz():
+    return JSONResponse(status_code=200 if READINESS["ready"] else 503, content=READINESS)
+
+
 @app.post("/query", response_model=RAGResponse, summary="Ask a question to the RAG system")
 async def ask_question(request: QueryRequest):
     if not request.query or not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
+    rag_pipeline = get_rag_pipeline()
     try:
         logging.info(f"Running query: {request.query}")
-        result = RAG_PIPELINE.run(
-            data={
-                "text_embedder": {"text": request.query},
-                "prompt_engine": {"query": request.query}
-            }
-        )
-        final_output = result["parser"]["result"]
+        inputs = build_query_inputs(request.query, max_context_tokens=request.max_context_tokens)
+        result = await asyncio.get_running_loop().run_in_executor(QUERY_EXECUTOR, rag_pipeline.run, inputs)
+        dropped_tokens = result.get("prompt_engine", {}).get("dropped_tokens")
+        if dropped_tokens:
+            logging.info(f"Context budget dropped {dropped_tokens} document tokens.")
+        final_output = extract_rag_result(result)
         return final_output
     except Exception as e:
         logging.error(f"Error during query processing: {e}")
@@ -64,33 +185,132 @@ async def ask_question(request: QueryRequest):
         return JSONResponse(status_code=500, content=error_response)
 
 
-@app.post("/update-articles", response_model=UpdateResponse, summary="Update articles in Pinecone from a JSON file")
-async def update_articles_from_file(file: UploadFile = File(...)):
+@app.post("/query/stream", summary="Ask a question and stream the answer as Server-Sent Events")
+async def ask_question_streaming(request: QueryRequest):
+    """
+    Streams `answer` events with pieces of the answer text as the model
+    generates them, then a `references` event and a final `result` event
+    holding the validated RAGResponse (or an `error` event).
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+    rag_pipeline = get_rag_pipeline()
+    logging.info(f"Running streamed query: {request.query}")
+    events = stream_rag_answer(rag_pipeline, request.query, max_context_tokens=request.max_context_tokens,
+                               executor=QUERY_EXECUTOR)
+    return StreamingResponse(
+        (format_sse(event, data) for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/cache-stats", summary="Hit-rate statistics for the query embedding cache")
+async def query_cache_stats():
+    text_embedder = get_rag_pipeline().get_component("text_embedder")
+    cache = getattr(text_embedder, "cache", None)
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats}
+
+
+async def spool_upload(file: UploadFile) -> Path:
+    """
+    Copies an upload to a temporary file in `config.UPLOAD_CHUNK_BYTES` pieces,
+    so it outlives the request without being held in memory. Raises a 413 once
+    it exceeds `config.MAX_UPLOAD_BYTES`.
+    """
+    if file.size is not None and file.size > config.MAX_UPLOAD_BYTES:
+        raise upload_too_large()
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".json", delete=False)
+    try:
+        with spool:
+            size = 0
+            while chunk := await file.read(config.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > config.MAX_UPLOAD_BYTES:
+                    raise upload_too_large()
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+    return Path(spool.name)
+
+
+def parse_upload(upload_path: Path) -> Iterator[Document]:
+    """
+    Yields the documents of a spooled upload, turning decode errors from the
+    parser into a ValueError for the client. Errors raised while the
+    documents are being indexed are not raised in here, so they keep their
+    own type and message.
+    """
+    try:
+        yield from stream_documents(upload_path)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid JSON format in the uploaded file.") from e
+
+
+def run_update_job(job: IndexingJob, upload_path: Path, prune: bool) -> Dict[str, Any]:
+    """
+    Streams a spooled upload through the incremental JSON parser into batched
+    indexing; runs on an indexing job worker and removes the file when done.
+    """
+    try:
+        documents = job.count_parsed(parse_upload(upload_path))
+        first = next(documents, None)
+        if first is None:
+            raise ValueError("No valid documents found in the uploaded file.")
+
+        logging.info(f"Job {job.id}: indexing documents from the upload...")
+        manifest = IndexManifest.load(config.INDEX_MANIFEST_PATH)
+        # An export that turns out to be malformed part-way stops the run
+        # before `prune` could delete anything.
+        stats = index_documents(document_store, chain([first], documents), manifest=manifest, delete_missing=prune,
+                                snapshot_path=config.SNAPSHOT_PATH, progress=job.advance)
+    finally:
+        os.unlink(upload_path)
+    if RAG_PIPELINE is not None:
+        reload_retriever_index(RAG_PIPELINE)
+    return {
+        "message": f"Successfully indexed {stats['indexed']} documents.",
+        "documents_processed": job.progress["parsed"],
+        "documents_indexed": stats["indexed"],
+        "documents_skipped": stats["skipped"],
+        "documents_deleted": stats["deleted"],
+    }
+
+
+@app.post("/update-articles", response_model=JobAcceptedResponse, status_code=202,
+          summary="Update articles in Pinecone from a JSON file in a background job")
+async def update_articles_from_file(file: UploadFile = File(...), prune: bool = False):
+    """
+    Accepts the upload and indexes it in a background job; poll the returned
+    `status_url` for progress and the outcome. The file is parsed, indexed
+    and staged for the corpus snapshot one batch at a time, so memory while
+    indexing does not grow with the upload; only the final snapshot update
+    grows with the corpus (see utils/benchmark_upload_memory.py).
+    New or changed articles are indexed, unchanged ones are skipped using the
+    local index manifest. Set `prune=true` only when the upload is the
+    complete export, to also delete articles that are no longer in it.
+    """
     if not file.filename.endswith('.json'):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a .json file.")
+    upload_path = await spool_upload(file)
     try:
-        file_content = await file.read()
-        json_data = json.loads(file_content.decode('utf-8'))
-        docs_to_index = process_json_data(json_data)
-        
-        if not docs_to_index:
-            raise HTTPException(status_code=400, detail="No valid documents found in the uploaded file.")
-
-        logging.info(f"Starting indexing for {len(docs_to_index)} documents...")
-        indexing_pipeline = build_indexing_pipeline(document_store)
-        indexing_pipeline.run({"embedder": {"documents": docs_to_index}})
-        return {"message": f"Successfully indexed {len(docs_to_index)} documents.", "documents_processed": len(docs_to_index)}
-
-    # --- KEY FIX: More specific error handling ---
-    except HTTPException as http_exc:
-        # Re-raise HTTPExceptions directly so FastAPI can handle them
-        raise http_exc
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON format in the uploaded file.")
-    except Exception as e:
-        # Catch any other unexpected errors as a 500
-        logging.error(f"Error during article update: {e}")
-        raise HTTPException(status_code=500, detail=f"An internal error occurred: {str(e)}")
+        job = INDEXING_JOBS.submit(lambda job: run_update_job(job, upload_path, prune))
+    except JobQueueFull as e:
+        os.unlink(upload_path)
+        raise HTTPException(status_code=429, detail=str(e))
+    logging.info(f"Accepted upload '{file.filename}' as indexing job {job.id}.")
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse, summary="Progress of a background indexing job")
+async def get_job_status(job_id: str):
+    job = INDEXING_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job ID.")
+    return job.to_dict()
 
 # ======================================================================================
 # 3. RUN THE APPLICATION (for local development)
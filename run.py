@@ -3,8 +3,9 @@ from pinecone import Pinecone, ServerlessSpec
 
 # Import from our source package
 from src import config
-from src.data_processor import load_and_process_data
-from src.pipelines import build_indexing_pipeline, build_rag_pipeline
+from src.data_processor import stream_documents
+from src.manifest import IndexManifest
+from src.pipelines import build_query_inputs, build_rag_pipeline, extract_rag_result, index_documents
 
 def initialize_pinecone_index():
     """Checks for and creates the Pinecone index if it doesn't exist."""
@@ -33,10 +34,11 @@ def main():
 
     if document_store.count_documents() == 0:
         print("Document store is empty. Starting the indexing process...")
-        docs_to_index = load_and_process_data(config.DATA_FILE_PATH)
-        indexing_pipeline = build_indexing_pipeline(document_store)
-        indexing_pipeline.run({"embedder": {"documents": docs_to_index}})
-        print(f"✅ Indexing complete. {len(docs_to_index)} documents written to Pinecone.")
+        # The index is empty, so force every article rather than trusting a stale manifest.
+        manifest = IndexManifest.load(config.INDEX_MANIFEST_PATH, force=True)
+        stats = index_documents(document_store, stream_documents(config.DATA_FILE_PATH), manifest=manifest,
+                                snapshot_path=config.SNAPSHOT_PATH)
+        print(f"✅ Indexing complete. {stats['indexed']} documents written to Pinecone.")
     else:
         print("Documents already indexed.")
 
@@ -55,15 +57,10 @@ def main():
             continue
         
         # --- KEY CHANGE 1: Correctly pass the query to the prompt_engine ---
-        result = rag_pipeline.run(
-            data={
-                "text_embedder": {"text": query},
-                "prompt_engine": {"query": query}
-            }
-        )
+        result = rag_pipeline.run(build_query_inputs(query))
 
         # --- KEY CHANGE 2: Access the structured JSON from the parser ---
-        parsed_result = result["parser"]["result"]
+        parsed_result = extract_rag_result(result)
         answer = parsed_result.get("answer", "No answer found.")
         references = parsed_result.get("references", [])
 
@@ -0,0 +1,179 @@
+# src/caching.py
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from haystack import component, Document
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so formatting-only edits map to the same cache entry."""
+    return " ".join(text.split())
+
+class EmbeddingCache:
+    """
+    A persistent, file-backed embedding store (SQLite). Entries are keyed on
+    the embedding model ID, the embedding dimension and a hash of the
+    normalized text, so switching models or dimensions never returns stale
+    vectors. Safe to share between threads.
+    """
+    def __init__(self, path: Path, model: str, dimension: int):
+        self.path = Path(path)
+        self.model = model
+        self.dimension = dimension
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        self._connection.commit()
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model}\x1f{self.dimension}\x1f{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Returns the cached embedding for each text, or None for misses."""
+        keys = [self.key(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            results = [found.get(key) for key in keys]
+            hit_count = sum(result is not None for result in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        rows = [(self.key(text), array("f", embedding).tobytes()) for text, embedding in zip(texts, embeddings)]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)", rows)
+            self._connection.commit()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+@component
+class CachedDocumentEmbedder:
+    """
+    Sits in front of a document embedder and only sends cache misses to it.
+    Embeddings for unchanged content (e.g. after a metadata-only change or a
+    forced full re-index) are served from the local `EmbeddingCache`.
+    """
+    def __init__(self, embedder: Any, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]) -> Dict[str, Any]:
+        texts = [document.content or "" for document in documents]
+        cached = self.cache.get_many(texts)
+        miss_indices = [i for i, embedding in enumerate(cached) if embedding is None]
+
+        if miss_indices:
+            misses = [documents[i] for i in miss_indices]
+            embedded = self.embedder.run(documents=misses)["documents"]
+            new_embeddings = [document.embedding for document in embedded]
+            self.cache.put_many([texts[i] for i in miss_indices], new_embeddings)
+            for i, embedding in zip(miss_indices, new_embeddings):
+                cached[i] = embedding
+
+        print(f"Embedding cache: {len(documents) - len(miss_indices)} hits, {len(miss_indices)} misses.")
+        return {"documents": [replace(document, embedding=embedding) for document, embedding in zip(documents, cached)]}
+
+
+class QueryEmbeddingCache:
+    """
+    An in-process LRU cache with a time-to-live for query embeddings. Entries
+    are keyed on the model ID and the normalized (case- and whitespace-folded)
+    query text, so repeated questions skip the Bedrock round trip.
+    """
+    def __init__(self, model: str, max_size: int = 1024, ttl_seconds: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.model = model
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> Tuple[str, str]:
+        return self.model, normalize_text(text).casefold()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = (self._clock(), list(embedding))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+@component
+class CachedTextEmbedder:
+    """
+    Drop-in replacement for a text embedder that answers repeated queries
+    from a `QueryEmbeddingCache`. Its `embedding` output is unchanged, so it
+    connects to `retriever.query_embedding` exactly like the wrapped embedder.
+    """
+    def __init__(self, embedder: Any, cache: QueryEmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str) -> Dict[str, Any]:
+        embedding = self.cache.get(text)
+        if embedding is None:
+            embedding = self.embedder.run(text=text)["embedding"]
+            self.cache.put(text, embedding)
+        return {"embedding": embedding}
@@ -0,0 +1,98 @@
+# src/checkpoint.py
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+def source_fingerprint(source: Path) -> str:
+    """A cheap fingerprint (size + mtime) used to notice the export changed between runs."""
+    stat = Path(source).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+class IndexingCheckpoint:
+    """
+    Progress of an in-flight indexing run, persisted after every committed
+    batch. The per-article state lives in the `IndexManifest`; the checkpoint
+    records which run it belongs to (its `run_id`), the run's settings and how
+    many batches were committed, so `--resume` can continue the same run
+    instead of starting a new one. The file is removed once a run completes.
+    """
+    VERSION = 1
+
+    def __init__(self, path: Path, source: str, full: bool, run_id: Optional[str] = None,
+                 fingerprint: Optional[str] = None, batches_committed: int = 0,
+                 documents_written: int = 0, started_at: Optional[float] = None):
+        self.path = Path(path)
+        self.source = str(source)
+        self.full = full
+        self.run_id = run_id or uuid.uuid4().hex
+        self.fingerprint = fingerprint
+        self.batches_committed = batches_committed
+        self.documents_written = documents_written
+        self.started_at = started_at or time.time()
+
+    @classmethod
+    def start(cls, path: Path, source: Path, full: bool) -> "IndexingCheckpoint":
+        """Begins a new run and writes its checkpoint immediately."""
+        checkpoint = cls(path, str(source), full, fingerprint=source_fingerprint(source))
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IndexingCheckpoint"]:
+        """Returns the checkpoint of an interrupted run, or None if there is nothing to resume."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            print(f"Ignoring indexing checkpoint at {path} with unsupported version {data.get('version')}.")
+            return None
+        return cls(
+            path,
+            source=data["source"],
+            full=data["full"],
+            run_id=data["run_id"],
+            fingerprint=data.get("fingerprint"),
+            batches_committed=data.get("batches_committed", 0),
+            documents_written=data.get("documents_written", 0),
+            started_at=data.get("started_at"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.VERSION,
+            "run_id": self.run_id,
+            "source": self.source,
+            "full": self.full,
+            "fingerprint": self.fingerprint,
+            "batches_committed": self.batches_committed,
+            "documents_written": self.documents_written,
+            "started_at": self.started_at,
+        }
+
+    def save(self) -> None:
+        """Atomically writes the checkpoint to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def source_changed(self) -> bool:
+        return source_fingerprint(Path(self.source)) != self.fingerprint
+
+    def record_batch(self, document_count: int) -> None:
+        """Marks one more batch as embedded, written and committed to the manifest."""
+        self.batches_committed += 1
+        self.documents_written += document_count
+        self.save()
+
+    def complete(self) -> None:
+        """Removes the checkpoint; the run finished and there is nothing left to resume."""
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,88 @@
+# src/chunking.py
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from haystack import component, Document
+
+# A cheap, model-agnostic approximation of sub-word tokenization: every run of
+# word characters and every punctuation mark counts as one token. It tends to
+# slightly undercount compared to Titan/Llama tokenizers, which is fine for
+# sizing chunks and budgets.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def approx_token_count(text: str) -> int:
+    """Returns an approximate token count for `text`."""
+    return len(_TOKEN_RE.findall(text))
+
+# Sentences end at ., ! or ? followed by whitespace.
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+")
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Returns (start, end) offsets of the sentences in `text`, excluding the whitespace between them."""
+    spans, start = [], 0
+    for match in _SENTENCE_BOUNDARY_RE.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def chunk_id(document: Document, index: int) -> str:
+    """Deterministic chunk ID derived from the parent article, e.g. '62000203783_2'."""
+    article_id = document.meta.get("article_id", document.id)
+    return f"{article_id}_{index}"
+
+@component
+class DocumentChunker:
+    """
+    Splits long documents into overlapping, token-sized chunks.
+
+    Documents that already fit into a single chunk pass through unchanged
+    (same ID, same meta), so short articles keep their existing index entries.
+    Longer ones become chunks with IDs derived from `article_id`, so
+    re-indexing the same article always overwrites the same vectors.
+    """
+    def __init__(self, chunk_tokens: int = 300, overlap_tokens: int = 50):
+        if chunk_tokens < 1:
+            raise ValueError("chunk_tokens must be at least 1.")
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be between 0 and chunk_tokens - 1.")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def split(self, document: Document) -> List[Document]:
+        """Splits a single document into its chunks."""
+        content = document.content or ""
+        spans = [match.span() for match in _TOKEN_RE.finditer(content)]
+        if len(spans) <= self.chunk_tokens:
+            return [document]
+
+        step = self.chunk_tokens - self.overlap_tokens
+        starts = list(range(0, len(spans) - self.overlap_tokens, step))
+        chunks = []
+        for index, first in enumerate(starts):
+            last = min(first + self.chunk_tokens, len(spans)) - 1
+            meta: Dict[str, Any] = {
+                **document.meta,
+                "parent_id": document.id,
+                "chunk_index": index,
+                "chunk_count": len(starts),
+            }
+            chunks.append(
+                Document(
+                    id=chunk_id(document, index),
+                    content=content[spans[first][0]:spans[last][1]],
+                    meta=meta,
+                )
+            )
+        return chunks
+
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily chunks a stream of documents, preserving order."""
+        for document in documents:
+            yield from self.split(document)
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]) -> Dict[str, Any]:
+        return {"documents": list(self.iter_chunks(documents))}
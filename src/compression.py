@@ -0,0 +1,104 @@
+# src/compression.py
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from haystack import component, Document
+
+from .chunking import approx_token_count, sentence_spans
+from .keyword_index import BM25Index
+
+SCORERS = ("lexical", "embedding")
+
+@component
+class ContextCompressor:
+    """
+    Extractive compression of retrieved documents before prompting. Every
+    sentence is scored against the question, and each document keeps its best
+    sentences (in their original order) up to `keep_ratio` of its tokens.
+    Title and other meta are untouched, so references still resolve.
+
+    `scorer` picks how sentences are scored:
+
+    - "lexical": BM25 of the question over the retrieved sentences, built
+      and scored in-process with `BM25Index`. No network calls.
+    - "embedding": cosine similarity to the query embedding. Sentences of all
+      documents are embedded in one call to `embedder` (a document embedder,
+      normally fronted by the on-disk `EmbeddingCache`) and scored with one
+      matrix-vector product. On a cold cache this sends every sentence to
+      Bedrock, which adds a network round trip to the query.
+
+    With `scorer=None` documents pass through.
+    """
+    def __init__(self, scorer: Optional[str] = None, embedder: Any = None, keep_ratio: float = 0.4, min_sentences: int = 2):
+        if scorer is not None and scorer not in SCORERS:
+            raise ValueError(f"Unknown compression scorer '{scorer}'. Use one of {', '.join(SCORERS)}.")
+        if scorer == "embedding" and embedder is None:
+            raise ValueError("The embedding compression scorer needs an embedder.")
+        self.scorer = scorer
+        self.embedder = embedder
+        self.keep_ratio = keep_ratio
+        self.min_sentences = max(1, min_sentences)
+
+    def _select(self, sentences: List[str], scores: np.ndarray) -> List[int]:
+        """Indices of the best-scoring sentences within the token budget, in document order."""
+        lengths = [approx_token_count(sentence) for sentence in sentences]
+        budget = self.keep_ratio * sum(lengths)
+        kept, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            if len(kept) >= self.min_sentences and used + lengths[i] > budget:
+                continue
+            kept.append(int(i))
+            used += lengths[i]
+        return sorted(kept)
+
+    def _lexical_scores(self, sentences: List[Document], query: str) -> np.ndarray:
+        return BM25Index.build(sentences).scores(query)
+
+    def _embedding_scores(self, sentences: List[Document], query_embedding: List[float]) -> np.ndarray:
+        embedded = self.embedder.run(documents=sentences)["documents"]
+        matrix = np.asarray([document.embedding for document in embedded], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        return matrix.dot(query / max(float(np.linalg.norm(query)), 1e-12))
+
+    @component.output_types(documents=List[Document], compression_ratio=float)
+    def run(self, documents: List[Document], query_embedding: Optional[List[float]] = None,
+            query: Optional[str] = None) -> Dict[str, Any]:
+        needed = query if self.scorer == "lexical" else query_embedding
+        if self.scorer is None or needed is None or not documents:
+            return {"documents": documents, "compression_ratio": 1.0}
+
+        per_document = []
+        for document in documents:
+            content = document.content or ""
+            sentences = [content[start:end] for start, end in sentence_spans(content)]
+            per_document.append(sentences if len(sentences) > self.min_sentences else None)
+        to_score = [Document(content=sentence) for sentences in per_document if sentences for sentence in sentences]
+        if not to_score:
+            return {"documents": documents, "compression_ratio": 1.0}
+
+        if self.scorer == "lexical":
+            scores = self._lexical_scores(to_score, query)
+        else:
+            scores = self._embedding_scores(to_score, query_embedding)
+
+        compressed, offset = [], 0
+        tokens_before = tokens_after = 0
+        for document, sentences in zip(documents, per_document):
+            before = approx_token_count(document.content or "")
+            tokens_before += before
+            if sentences is None:
+                compressed.append(document)
+                tokens_after += before
+                continue
+            kept = self._select(sentences, scores[offset:offset + len(sentences)])
+            offset += len(sentences)
+            content = " ".join(sentences[i] for i in kept)
+            tokens_after += approx_token_count(content)
+            compressed.append(replace(document, content=content))
+
+        ratio = tokens_after / tokens_before if tokens_before else 1.0
+        print(f"Context compression: kept {tokens_after} of {tokens_before} document tokens ({ratio:.0%}).")
+        return {"documents": compressed, "compression_ratio": ratio}
@@ -0,0 +1,209 @@
+# src/concurrency.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional
+
+from haystack import component, Document
+from haystack.document_stores.types import DuplicatePolicy
+
+def is_throttling_error(exception: BaseException) -> bool:
+    """
+    Returns True if an exception (or anything in its cause chain) is a Bedrock
+    ThrottlingException. The Haystack Bedrock components wrap botocore's
+    ClientError in AmazonBedrockInferenceError, so we walk `__cause__`.
+    """
+    while exception is not None:
+        response = getattr(exception, "response", None)
+        if isinstance(response, dict) and response.get("Error", {}).get("Code") in ("ThrottlingException", "TooManyRequestsException"):
+            return True
+        if "ThrottlingException" in str(exception):
+            return True
+        exception = exception.__cause__
+    return False
+
+class TokenBucket:
+    """
+    A thread-safe token-bucket rate limiter. `rate` tokens are added per second
+    up to `capacity`; `acquire` blocks until a token is available. A rate of
+    0 or less disables limiting.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds the number of in-flight requests with an AIMD policy: the limit is
+    halved whenever the service throttles us, and grows back by one after
+    `increase_after` consecutive successes, up to `max_limit`.
+    """
+    def __init__(self, max_limit: int, min_limit: int = 1, increase_after: int = 10):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = self.max_limit
+        self.increase_after = increase_after
+        self.throttle_count = 0
+        self._in_flight = 0
+        self._success_streak = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        with self._condition:
+            self._success_streak += 1
+            if self._success_streak >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._success_streak = 0
+                self._condition.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._condition:
+            self.throttle_count += 1
+            self._success_streak = 0
+            self.limit = max(self.min_limit, self.limit // 2)
+
+
+@component
+class ConcurrentDocumentEmbedder:
+    """
+    Embeds documents one request at a time (as Titan requires) but keeps up
+    to `max_concurrency` requests in flight on a bounded thread pool. Requests
+    pass through a token-bucket rate limiter, concurrency backs off when
+    Bedrock throttles, and throttled requests are retried with exponential
+    backoff. Output order always matches input order.
+    """
+    def __init__(self, embedder: Any, max_concurrency: int = 8, requests_per_second: float = 0.0,
+                 max_retries: int = 5, backoff_seconds: float = 0.5):
+        self.embedder = embedder
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.limiter = AdaptiveConcurrencyLimiter(self.max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def _embed_one(self, document: Document) -> List[float]:
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            self.limiter.acquire()
+            try:
+                # Embed a copy: the Bedrock embedder sets `embedding` in place.
+                embedded = self.embedder.run(documents=[replace(document)])["documents"][0]
+            except Exception as e:
+                if not is_throttling_error(e) or attempt >= self.max_retries:
+                    raise
+                self.limiter.on_throttle()
+            else:
+                self.limiter.on_success()
+                return embedded.embedding
+            finally:
+                self.limiter.release()
+            delay = self.backoff_seconds * (2 ** attempt)
+            time.sleep(delay + random.uniform(0, delay))
+            attempt += 1
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]) -> Dict[str, Any]:
+        if not documents:
+            return {"documents": []}
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(documents))) as executor:
+            embeddings = list(executor.map(self._embed_one, documents))
+        return {"documents": [replace(document, embedding=embedding) for document, embedding in zip(documents, embeddings)]}
+
+
+@component
+class BatchedDocumentWriter:
+    """
+    A replacement for `DocumentWriter` that splits the documents into batches
+    of `batch_size`, writes up to `max_concurrency` batches to the document
+    store in parallel and retries failed batches individually. One oversized
+    upsert no longer stalls or fails the whole write; if a batch still fails
+    after `max_retries`, an error naming the failed batches is raised once
+    the remaining batches are done (overwrites are idempotent, so re-running
+    is safe).
+    """
+    def __init__(self, document_store: Any, batch_size: int = 16, max_concurrency: int = 4,
+                 max_retries: int = 3, backoff_seconds: float = 0.5,
+                 policy: DuplicatePolicy = DuplicatePolicy.OVERWRITE):
+        self.document_store = document_store
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.policy = policy
+
+    def _write_batch(self, index: int, batch: List[Document]) -> Dict[str, Any]:
+        attempts = 0
+        start = time.perf_counter()
+        while True:
+            attempts += 1
+            try:
+                written = self.document_store.write_documents(batch, policy=self.policy)
+            except Exception as e:
+                if attempts > self.max_retries:
+                    return {"batch": index, "size": len(batch), "attempts": attempts,
+                            "latency_seconds": time.perf_counter() - start, "error": str(e)}
+                delay = self.backoff_seconds * (2 ** (attempts - 1))
+                time.sleep(delay + random.uniform(0, delay))
+                continue
+            return {"batch": index, "size": len(batch), "written": written, "attempts": attempts,
+                    "latency_seconds": time.perf_counter() - start}
+
+    @component.output_types(documents_written=int, batch_stats=List[Dict[str, Any]])
+    def run(self, documents: List[Document]) -> Dict[str, Any]:
+        batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
+        if not batches:
+            return {"documents_written": 0, "batch_stats": []}
+        # PineconeDocumentStore connects lazily on its first write; concurrent
+        # first writes would each connect (and try to create a missing index).
+        initialize_index = getattr(self.document_store, "_initialize_index", None)
+        if initialize_index is not None:
+            initialize_index()
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+            batch_stats = list(executor.map(self._write_batch, range(len(batches)), batches))
+
+        for stats in batch_stats:
+            status = f"failed ({stats['error']})" if "error" in stats else "ok"
+            print(f"Write batch {stats['batch']}: {stats['size']} docs in {stats['latency_seconds'] * 1000:.0f} ms "
+                  f"after {stats['attempts']} attempt(s), {status}.")
+        failed = [stats for stats in batch_stats if "error" in stats]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(batches)} write batches failed after {self.max_retries} retries: "
+                + "; ".join(f"batch {stats['batch']}: {stats['error']}" for stats in failed)
+            )
+        return {"documents_written": sum(stats["written"] or 0 for stats in batch_stats), "batch_stats": batch_stats}
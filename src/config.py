@@ -19,9 +19,122 @@ GENERATOR_MODEL_ID = "us.meta.llama3-2-90b-instruct-v1:0" # The model for the ma
 
 EMBEDDING_DIMENSION = 1024
 
+# --- Retrieval Configuration ---
+# "pinecone" queries the Pinecone index for every question; "numpy" loads the
+# corpus once into an in-process exact vector index (no network round trip).
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "pinecone").lower()
+RETRIEVER_TOP_K = int(os.getenv("RETRIEVER_TOP_K", "3"))
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float32")  # or "float16" to halve memory
+# Hybrid retrieval adds a BM25 keyword search over the corpus snapshot and
+# merges it with the dense results by reciprocal rank fusion. Each side
+# contributes HYBRID_CANDIDATES documents; RETRIEVER_TOP_K are kept.
+HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Approximate token budget for the documents in the prompt's <context> block.
+# Documents are packed in rank order and the last one is cut at a sentence
+# boundary. 0 means no limit; /query requests can override it.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0"))
+# Optional extractive compression: keep only each document's sentences most
+# relevant to the question, up to COMPRESSION_KEEP_RATIO of its tokens.
+# COMPRESSION_SCORER "lexical" scores sentences with BM25 in-process;
+# "embedding" embeds every retrieved sentence through Bedrock (via the on-disk
+# embedding cache), one extra call per query on a cold cache.
+# utils/benchmark_compression.py measures token savings and answer coverage:
+# at the default ratio the lexical scorer cuts context tokens by about 60%, but
+# drops some ground-truth wording, so compression stays off by default.
+CONTEXT_COMPRESSION_ENABLED = os.getenv("CONTEXT_COMPRESSION_ENABLED", "false").lower() == "true"
+COMPRESSION_SCORER = os.getenv("COMPRESSION_SCORER", "lexical")
+COMPRESSION_KEEP_RATIO = float(os.getenv("COMPRESSION_KEEP_RATIO", "0.4"))
+COMPRESSION_MIN_SENTENCES = int(os.getenv("COMPRESSION_MIN_SENTENCES", "2"))
+# Questions whose best dense similarity is below this threshold get the
+# canonical no-answer response without calling the generator. 0 disables the
+# gate; tune it with utils/tune_no_answer_threshold.py.
+NO_ANSWER_SCORE_THRESHOLD = float(os.getenv("NO_ANSWER_SCORE_THRESHOLD", "0"))
+# Optional cross-encoder reranking: retrieve RERANK_CANDIDATES documents, score
+# them against the question on the CPU and keep the best RETRIEVER_TOP_K. The
+# model (sentence-transformers) is only loaded when the first query arrives.
+RERANKER_ENABLED = os.getenv("RERANKER_ENABLED", "false").lower() == "true"
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+# By default every candidate is scored in one batched forward pass. The
+# latency budget is only checked between batches, so it takes effect only
+# when RERANK_BATCH_SIZE is set below RERANK_CANDIDATES.
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", str(RERANK_CANDIDATES)))
+RERANK_MAX_LATENCY_MS = float(os.getenv("RERANK_MAX_LATENCY_MS", "500"))
+
 # --- Data Configuration ---
 DATA_FILE_PATH = Path("data/4dcrm_articles_demo.json")
 
+# --- Indexing Configuration ---
+# Number of documents embedded and written per indexing pipeline run when
+# documents are streamed from disk instead of loaded all at once.
+INDEXING_BATCH_SIZE = int(os.getenv("INDEXING_BATCH_SIZE", "64"))
+
+# Long articles are split into overlapping chunks of roughly this many tokens
+# before embedding. Set CHUNK_SIZE_TOKENS to 0 to index whole articles.
+CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "300"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+# Local state for incremental re-indexing (article hashes, last updated_at).
+CACHE_DIR = Path(os.getenv("RAG_CACHE_DIR", ".cache"))
+INDEX_MANIFEST_PATH = CACHE_DIR / f"{PINECONE_INDEX_NAME}_manifest.json"
+INDEXING_CHECKPOINT_PATH = CACHE_DIR / f"{PINECONE_INDEX_NAME}_checkpoint.json"
+
+# Memory-mappable snapshot of the embedded corpus, refreshed by indexing runs
+# and loaded by the "numpy" retrieval backend at startup.
+SNAPSHOT_PATH = CACHE_DIR / f"{PINECONE_INDEX_NAME}_snapshot"
+
+# On-disk document embedding cache, keyed on (model, dimension, content hash).
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embeddings.sqlite3"
+
+# Concurrent document embedding. Titan embeds one text per request, so bulk
+# indexing keeps up to EMBEDDING_CONCURRENCY requests in flight, capped at
+# EMBEDDING_REQUESTS_PER_SECOND (0 = no rate limit). 1 keeps the serial path.
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "8"))
+EMBEDDING_REQUESTS_PER_SECOND = float(os.getenv("EMBEDDING_REQUESTS_PER_SECOND", "20"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+
+# Pinecone upserts: documents are written in batches of WRITE_BATCH_SIZE with up
+# to WRITE_CONCURRENCY batches in flight; failed batches are retried on their own.
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "16"))
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "4"))
+WRITE_MAX_RETRIES = int(os.getenv("WRITE_MAX_RETRIES", "3"))
+
+# In-process LRU + TTL cache for query embeddings. A size of 0 disables it.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+# HTML cleaning during processing. 1 keeps the original serial path; higher
+# values strip HTML in a process pool, handing each worker CHUNK_SIZE articles.
+CLEANING_WORKERS = int(os.getenv("CLEANING_WORKERS", "1"))
+CLEANING_CHUNK_SIZE = int(os.getenv("CLEANING_CHUNK_SIZE", "32"))
+
+# After startup the API embeds WARM_UP_QUERY and runs one retrieval, so the first
+# real query doesn't pay for connections and model loading; /readyz reports 503
+# until this has succeeded.
+WARM_UP_ENABLED = os.getenv("WARM_UP_ENABLED", "true").lower() == "true"
+WARM_UP_QUERY = os.getenv("WARM_UP_QUERY", "How do I add a new contact?")
+
+# Queries run on a pool of QUERY_CONCURRENCY worker threads so the API's event
+# loop never blocks on Bedrock or Pinecone. Further queries wait for a free worker.
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", "8"))
+
+# Uploads to /update-articles are indexed by background jobs. Jobs update the
+# shared index manifest and snapshot, so they run one at a time; at most
+# INDEXING_MAX_PENDING_JOBS may be queued or running before uploads are refused.
+INDEXING_JOB_CONCURRENCY = 1
+INDEXING_MAX_PENDING_JOBS = int(os.getenv("INDEXING_MAX_PENDING_JOBS", "8"))
+# Uploads are copied to a temporary file in UPLOAD_CHUNK_BYTES pieces and parsed
+# incrementally from there, so parsing does not hold the upload in memory;
+# larger uploads are refused. Request bodies larger than MAX_UPLOAD_BYTES plus
+# UPLOAD_FORM_OVERHEAD_BYTES (room for the multipart boundaries and part
+# headers) are refused before the form is parsed, so they are never spooled.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+
 # --- Evaluation Configuration ---
 # A powerful model is recommended for the "LLM-as-Judge" in Deepeval
 EVALUATION_MODEL_ID = "us.meta.llama3-2-90b-instruct-v1:0"
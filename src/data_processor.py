@@ -1,56 +1,178 @@
 # src/data_processor.py
 
 import json
-from typing import List, Dict, Any
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 
 from bs4 import BeautifulSoup
 from haystack import Document
 
-def process_json_data(json_data: List[Dict[str, Any]]) -> List[Document]:
+from . import config
+from .json_stream import iter_articles
+
+# (category_name, folder_name, article) as produced by the export walkers.
+ArticleRecord = Tuple[Optional[str], Optional[str], Dict[str, Any]]
+
+def _raw_content(article: Dict[str, Any]) -> str:
+    return f"{article.get('title', '')}. {article.get('description_text', '')}"
+
+# --- Markup-aware fast path ---
+# Most articles are already plain text, so building a BeautifulSoup tree for
+# them is wasted work. These patterns decide when a cheap stripper produces
+# exactly what `BeautifulSoup(..., "html.parser").get_text().strip()` would.
+_ENTITY_RE = re.compile(r'&(?:#|[A-Za-z])')
+# Attribute-free formatting tags only. `</br>` is deliberately excluded
+# because html.parser treats it as a line break rather than an end tag.
+_SIMPLE_TAG_RE = re.compile(
+    r'<(?:p|b|i|u|em|strong|span|div|br|ul|ol|li|h[1-6])\s*/?>'
+    r'|</(?:p|b|i|u|em|strong|span|div|ul|ol|li|h[1-6])\s*>',
+    re.IGNORECASE,
+)
+# BeautifulSoup collapses text nodes made only of these characters.
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+def _strip_simple_markup(raw_content: str) -> Optional[str]:
     """
-    Processes a list of dictionary objects into Haystack Documents.
+    Returns the cleaned text for plain or near-plain input, or None when the
+    string needs a real HTML parser (entities, attributes, comments, etc.).
+    """
+    if '&' in raw_content and _ENTITY_RE.search(raw_content):
+        return None
+    if '<' not in raw_content:
+        return raw_content.strip()
+
+    segments = _SIMPLE_TAG_RE.split(raw_content)
+    if any('<' in segment for segment in segments):
+        return None
+    for i, segment in enumerate(segments):
+        # Mirror BeautifulSoup: whitespace-only text between tags becomes a
+        # single newline (if it contained one) or a single space.
+        if segment and not segment.strip(_ASCII_SPACES):
+            segments[i] = '\n' if '\n' in segment else ' '
+    return ''.join(segments).strip()
+
+def clean_text(raw_content: str) -> str:
+    """Strips HTML markup from an article's raw text."""
+    fast_result = _strip_simple_markup(raw_content)
+    if fast_result is not None:
+        return fast_result
+    return BeautifulSoup(raw_content, "html.parser").get_text().strip()
+
+def _article_to_document(category_name: Optional[str], folder_name: Optional[str], article: Dict[str, Any], clean_content: Optional[str] = None) -> Optional[Document]:
     """
-    documents = []
+    Converts a single article into a Haystack Document, or returns None if the
+    article has no ID or no meaningful text content. `clean_content` may be
+    passed in when the HTML was already stripped elsewhere (e.g. in a worker).
+    """
+    title = article.get('title', '')
+    if clean_content is None:
+        clean_content = clean_text(_raw_content(article))
+
+    # --- KEY FIX 1: Stricter check to filter out empty/useless documents ---
+    # An article is only valid if it has an ID and meaningful text content.
+    if not (article.get("id") and clean_content and clean_content != '.'):
+        return None
+
+    metadata = {
+        "article_id": article.get("id"),
+        "category": category_name,
+        "folder": folder_name,
+        "title": title,
+        "tags": article.get("tags", []),
+    }
+    # Used by the index manifest to track what was last indexed.
+    if article.get("updated_at"):
+        metadata["updated_at"] = article["updated_at"]
+
+    doc_id = str(article.get("id"))
+
+    return Document(
+        id=doc_id,
+        content=clean_content,
+        meta=metadata
+    )
+
+def _iter_records(json_data: List[Dict[str, Any]]) -> Iterator[ArticleRecord]:
     for category in json_data:
         for folder in category.get("folders", []):
             for article in folder.get("articles", []):
-                title = article.get('title', '')
-                description = article.get('description_text', '')
-                
-                raw_content = f"{title}. {description}"
-                clean_content = BeautifulSoup(raw_content, "html.parser").get_text().strip()
-                
-                # --- KEY FIX 1: Stricter check to filter out empty/useless documents ---
-                # An article is only valid if it has an ID and meaningful text content.
-                if article.get("id") and clean_content and clean_content != '.':
-                    metadata = {
-                        "article_id": article.get("id"),
-                        "category": category.get("category_name"),
-                        "folder": folder.get("folder_name"),
-                        "title": title,
-                        "tags": article.get("tags", []),
-                    }
-                    
-                    doc_id = str(article.get("id"))
-                    
-                    documents.append(
-                        Document(
-                            id=doc_id,
-                            content=clean_content,
-                            meta=metadata
-                        )
-                    )
-    
+                yield category.get("category_name"), folder.get("folder_name"), article
+
+def _iter_record_documents(records: Iterable[ArticleRecord], workers: Optional[int] = None, chunk_size: Optional[int] = None) -> Iterator[Document]:
+    """
+    Turns article records into Documents. With `workers` > 1 the HTML cleaning
+    is fanned out to a process pool; records are submitted in bounded windows
+    and results are consumed in submission order, so document order and IDs
+    are identical to the serial path and lazy inputs stay lazy.
+    """
+    workers = workers if workers is not None else config.CLEANING_WORKERS
+    chunk_size = chunk_size or config.CLEANING_CHUNK_SIZE
+
+    if workers <= 1:
+        for category_name, folder_name, article in records:
+            document = _article_to_document(category_name, folder_name, article)
+            if document is not None:
+                yield document
+        return
+
+    records = iter(records)
+    window_size = workers * chunk_size * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while window := list(islice(records, window_size)):
+            raw_contents = [_raw_content(article) for _, _, article in window]
+            cleaned = executor.map(clean_text, raw_contents, chunksize=chunk_size)
+            for (category_name, folder_name, article), clean_content in zip(window, cleaned):
+                document = _article_to_document(category_name, folder_name, article, clean_content)
+                if document is not None:
+                    yield document
+
+def iter_documents(json_data: List[Dict[str, Any]], workers: Optional[int] = None, chunk_size: Optional[int] = None) -> Iterator[Document]:
+    """
+    Lazily yields Haystack Documents from an already-parsed list of categories.
+    """
+    return _iter_record_documents(_iter_records(json_data), workers, chunk_size)
+
+def process_json_data(json_data: List[Dict[str, Any]], workers: Optional[int] = None, chunk_size: Optional[int] = None) -> List[Document]:
+    """
+    Processes a list of dictionary objects into Haystack Documents.
+    `workers` > 1 cleans HTML in a process pool (see `config.CLEANING_WORKERS`).
+    """
+    documents = list(iter_documents(json_data, workers, chunk_size))
     print(f"Successfully processed {len(documents)} documents from JSON data.")
     return documents
 
-def load_and_process_data(file_path: Path) -> List[Document]:
+def load_and_process_data(file_path: Path, workers: Optional[int] = None, chunk_size: Optional[int] = None) -> List[Document]:
     """
     Loads a JSON file from a path and processes it into Haystack Documents.
     """
     print(f"Loading data from {file_path}...")
     with open(file_path, "r", encoding="utf-8") as f:
         data = json.load(f)
-    return process_json_data(data)
+    return process_json_data(data, workers, chunk_size)
+
+def stream_documents(file_path: Path, workers: Optional[int] = None, chunk_size: Optional[int] = None) -> Iterator[Document]:
+    """
+    Streaming counterpart of `load_and_process_data`. The JSON file is parsed
+    incrementally and Documents are yielded one at a time, so peak memory is
+    bounded by a single article rather than the whole export.
+    """
+    print(f"Streaming data from {file_path}...")
+    count = 0
+    with open(file_path, "r", encoding="utf-8") as f:
+        for document in _iter_record_documents(iter_articles(f), workers, chunk_size):
+            count += 1
+            yield document
+    print(f"Successfully processed {count} documents from JSON data.")
 
+def batched(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+    """
+    Groups a (possibly lazy) stream of Documents into lists of at most `batch_size`.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    iterator = iter(documents)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
@@ -0,0 +1,120 @@
+# src/jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from haystack import Document
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the maximum number of jobs is already waiting or running."""
+
+class IndexingJob:
+    """
+    Status and progress of one background indexing run. Counters are updated
+    from the worker thread through `advance`; readers take a consistent copy
+    with `to_dict`. "parsed" and "skipped" count articles from the upload;
+    "embedded" and "written" count the chunks they are split into.
+    """
+    STAGES = ("parsed", "skipped", "embedded", "written")
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.progress = {stage: 0 for stage in self.STAGES}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def advance(self, stage: str, count: int = 1) -> None:
+        with self._lock:
+            self.progress[stage] += count
+
+    def count_parsed(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Passes `documents` (articles) through, counting each one as parsed."""
+        for document in documents:
+            self.advance("parsed")
+            yield document
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "articles_parsed": self.progress["parsed"],
+                "articles_skipped": self.progress["skipped"],
+                "chunks_embedded": self.progress["embedded"],
+                "chunks_written": self.progress["written"],
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+class JobManager:
+    """
+    Runs indexing jobs on `max_concurrency` worker threads and keeps their
+    status for polling. At most `max_pending` jobs may be queued or running at
+    once (`submit` raises `JobQueueFull` beyond that), and only the
+    `max_finished` most recent finished jobs are remembered.
+    """
+    def __init__(self, max_concurrency: int = 1, max_pending: int = 8, max_finished: int = 100):
+        self.max_pending = max(1, max_pending)
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, IndexingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="indexing-job")
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def submit(self, target: Callable[[IndexingJob], Dict[str, Any]]) -> IndexingJob:
+        """
+        Queues `target(job)`, whose return value becomes the job's `result`.
+        An exception marks the job as failed with the exception's message.
+        """
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} indexing jobs are already queued or running.")
+            job = IndexingJob()
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def _run(self, job: IndexingJob, target: Callable[[IndexingJob], Dict[str, Any]]) -> None:
+        with job._lock:
+            job.status, job.started_at = "running", time.time()
+        try:
+            result, error, status = target(job), None, "succeeded"
+        except Exception as e:
+            logger.exception(f"Indexing job {job.id} failed.")
+            result, error, status = None, str(e), "failed"
+        with job._lock:
+            job.result, job.error, job.status, job.finished_at = result, error, status, time.time()
+
+    def get(self, job_id: str) -> Optional[IndexingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
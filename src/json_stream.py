@@ -0,0 +1,140 @@
+# src/json_stream.py
+
+import json
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+_DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class _JsonStreamReader:
+    """
+    A minimal pull-based reader over a text stream. It keeps only the part of
+    the input that has not been consumed yet, so memory is bounded by the
+    largest single value decoded with `decode_value`, not by the file size.
+    """
+    def __init__(self, stream: TextIO, chunk_size: int = _DEFAULT_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Reads another chunk into the buffer. Returns False at end of input."""
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed prefix so the buffer never grows with the file.
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def decode_value(self) -> Any:
+        """Decodes one complete JSON value (scalar, object or array) from the stream."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value is cut off by the chunk boundary.
+                if self._fill():
+                    continue
+                raise
+            if end == len(self._buffer) and self._fill():
+                # A bare number ending at the buffer edge ("12") may continue
+                # in the next chunk ("1234"), so read more and decode again.
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator[None]:
+        """
+        Steps through a JSON array, yielding once per element. The caller must
+        consume exactly one value (or sub-structure) per iteration.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Steps through a JSON object, yielding each key. The caller must consume
+        the matching value before asking for the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", self._buffer, self._pos)
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos - 1)
+
+
+def iter_articles(stream: TextIO, chunk_size: int = _DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[Optional[str], Optional[str], Dict[str, Any]]]:
+    """
+    Incrementally walks a category -> folder -> article export and yields
+    (category_name, folder_name, article) tuples one article at a time.
+
+    Only a single article is ever fully decoded in memory. Category and folder
+    names are picked up from keys seen *before* the "folders"/"articles" lists,
+    which is the layout of our knowledge-base exports.
+    """
+    reader = _JsonStreamReader(stream, chunk_size)
+    for _ in reader.iter_array():
+        category_name = None
+        for category_key in reader.iter_object():
+            if category_key == "category_name":
+                category_name = reader.decode_value()
+            elif category_key == "folders" and reader.peek() == "[":
+                for _ in reader.iter_array():
+                    folder_name = None
+                    for folder_key in reader.iter_object():
+                        if folder_key == "folder_name":
+                            folder_name = reader.decode_value()
+                        elif folder_key == "articles" and reader.peek() == "[":
+                            for _ in reader.iter_array():
+                                yield category_name, folder_name, reader.decode_value()
+                        else:
+                            reader.decode_value()
+            else:
+                reader.decode_value()
+    if reader.peek() != "":
+        raise json.JSONDecodeError("Extra data", "", 0)
@@ -0,0 +1,120 @@
+# src/keyword_index.py
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from haystack import Document
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps product names like "WePay" or "2FA" intact."""
+    return _TOKEN_RE.findall(text.lower())
+
+def document_text(document: Document) -> str:
+    """The text a document is keyword-indexed on: its title, tags and content."""
+    meta = document.meta or {}
+    tags = meta.get("tags") or []
+    return " ".join([meta.get("title") or "", " ".join(str(tag) for tag in tags), document.content or ""])
+
+class BM25Index:
+    """
+    A precomputed Okapi BM25 inverted index. Postings are stored as flat
+    arrays: for term `t`, `postings[offsets[t]:offsets[t + 1]]` are the rows
+    containing it and `weights[...]` their full BM25 term weights (IDF and
+    length normalization included), so a query is a handful of array slices
+    added into a score vector rather than a scan over the corpus.
+    """
+    def __init__(self, vocabulary: Dict[str, int], offsets: np.ndarray, postings: np.ndarray,
+                 weights: np.ndarray, document_count: int):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.document_count = document_count
+
+    @classmethod
+    def build(cls, documents: Iterable[Document], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Indexes `documents` (any iterable, read once); result rows are their
+        positions. Postings are collected as compact per-document arrays, so a
+        large corpus can be streamed from disk into the index.
+        """
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[np.ndarray] = []
+        frequencies: List[np.ndarray] = []
+        lengths: List[int] = []
+        for document in documents:
+            counts = Counter(tokenize(document_text(document)))
+            lengths.append(sum(counts.values()))
+            term_ids.append(np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for term in counts),
+                                        dtype=np.int32, count=len(counts)))
+            frequencies.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+
+        document_count = len(lengths)
+        lengths_array = np.asarray(lengths, dtype=np.float32)
+        average_length = float(lengths_array.mean()) if document_count and lengths_array.mean() > 0 else 1.0
+        terms = sorted(vocabulary)
+        # Renumber terms alphabetically, then group postings by term; the
+        # stable sort keeps each postings list in row order.
+        rank = np.empty(len(terms), dtype=np.int32)
+        rank[[vocabulary[term] for term in terms]] = np.arange(len(terms), dtype=np.int32)
+        per_posting_terms = rank[np.concatenate(term_ids)] if term_ids else np.zeros(0, dtype=np.int32)
+        rows = np.repeat(np.arange(document_count, dtype=np.int32), [len(ids) for ids in term_ids])
+        tfs = np.concatenate(frequencies) if frequencies else np.zeros(0, dtype=np.float32)
+        order = np.argsort(per_posting_terms, kind="stable")
+        per_posting_terms, postings, tfs = per_posting_terms[order], rows[order], tfs[order]
+
+        document_frequency = np.bincount(per_posting_terms, minlength=len(terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=offsets[1:])
+        idf = np.log(1.0 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1.0 - b + b * lengths_array[postings] / average_length)
+        weights = (idf[per_posting_terms] * tfs * (k1 + 1.0) / (tfs + norm)).astype(np.float32)
+        return cls({term: i for i, term in enumerate(terms)}, offsets, postings.astype(np.int32), weights, document_count)
+
+    def save(self, path: Path) -> None:
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=str)
+        with open(path, "wb") as f:
+            np.savez(f, terms=terms, offsets=self.offsets, postings=self.postings,
+                     weights=self.weights, document_count=np.array(self.document_count))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            vocabulary = {str(term): i for i, term in enumerate(data["terms"])}
+            return cls(vocabulary, data["offsets"], data["postings"], data["weights"], int(data["document_count"]))
+
+    def __len__(self) -> int:
+        return self.document_count
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for `query` (zero where no query term occurs)."""
+        scores = np.zeros(self.document_count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self.vocabulary.get(term)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            # Rows are unique within a postings list, so fancy-index += is safe.
+            scores[self.postings[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, top_k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Returns up to `top_k` (row, score) pairs with a positive score, best first."""
+        if not self.document_count or top_k <= 0:
+            return []
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        matching = np.flatnonzero(scores > 0)
+        if len(matching) > top_k:
+            matching = matching[np.argpartition(-scores[matching], top_k - 1)[:top_k]]
+        ranked = matching[np.argsort(-scores[matching], kind="stable")]
+        return [(int(row), float(scores[row])) for row in ranked]
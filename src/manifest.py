@@ -0,0 +1,141 @@
+# src/manifest.py
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from haystack import Document
+
+class IndexManifest:
+    """
+    A persistent local record of what has already been indexed. It maps each
+    article_id to a content hash, the last indexed `updated_at` and the
+    document IDs written for it, so re-indexing runs only embed new or changed
+    articles and can delete the ones that vanished from the export.
+
+    Every entry also records the `run_id` that wrote it. With `force=True`
+    (a full re-index) only articles already written by *this* run are
+    skipped, which is what lets an interrupted full run be resumed.
+    """
+    VERSION = 1
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 run_id: Optional[str] = None, force: bool = False):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.run_id = run_id or uuid.uuid4().hex
+        self.force = force
+        self._seen: Set[str] = set()
+        # Hashes computed before embedding, keyed by article. Writers may drop
+        # unsupported meta fields in place, so we never re-hash after a write.
+        self._pending_hashes: Dict[str, str] = {}
+        self._pending_ids: Dict[str, List[str]] = {}
+
+    @classmethod
+    def load(cls, path: Path, run_id: Optional[str] = None, force: bool = False) -> "IndexManifest":
+        """Loads the manifest from disk, or starts an empty one if none exists."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path, run_id=run_id, force=force)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            print(f"Ignoring index manifest at {path} with unsupported version {data.get('version')}.")
+            return cls(path, run_id=run_id, force=force)
+        return cls(path, data.get("articles", {}), run_id=run_id, force=force)
+
+    def save(self) -> None:
+        """Atomically writes the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "articles": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def article_key(document: Document) -> str:
+        return str(document.meta.get("article_id", document.id))
+
+    @staticmethod
+    def content_hash(document: Document) -> str:
+        """
+        Hashes everything that ends up in the index for a document. `updated_at`
+        is left out so a touched-but-unchanged article is not re-embedded.
+        """
+        meta = {key: value for key, value in document.meta.items() if key != "updated_at"}
+        payload = json.dumps({"content": document.content, "meta": meta}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def needs_indexing(self, document: Document) -> bool:
+        """Returns True if the document is new or its content changed since the last run."""
+        key = self.article_key(document)
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        content_hash = self.content_hash(document)
+        if (
+            entry is None
+            or entry.get("content_hash") != content_hash
+            or (self.force and entry.get("run_id") != self.run_id)
+        ):
+            self._pending_hashes[key] = content_hash
+            return True
+        # Unchanged content: keep the newest timestamp so the manifest stays current.
+        if document.meta.get("updated_at"):
+            entry["updated_at"] = document.meta["updated_at"]
+        return False
+
+    def filter_changed(self, documents: Iterable[Document], stats: Dict[str, int]) -> Iterator[Document]:
+        """Lazily drops unchanged documents, counting them in stats["skipped"]."""
+        for document in documents:
+            if self.needs_indexing(document):
+                yield document
+            else:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+
+    def mark_indexed(self, documents: Iterable[Document]) -> List[str]:
+        """
+        Records documents that were successfully embedded and written.
+
+        Chunks of one article may arrive over several batches; the article is
+        only committed once all `chunk_count` chunks are written, so a crash
+        mid-article re-indexes it next time. Returns document IDs from the
+        previous run of committed articles that are no longer used (e.g. an
+        article that grew from one document into several chunks) so the caller
+        can delete them.
+        """
+        superseded: List[str] = []
+        for document in documents:
+            key = self.article_key(document)
+            self._seen.add(key)
+            written_ids = self._pending_ids.setdefault(key, [])
+            written_ids.append(document.id)
+            if len(written_ids) < document.meta.get("chunk_count", 1):
+                continue
+
+            del self._pending_ids[key]
+            previous_ids = self.entries.get(key, {}).get("document_ids", [])
+            superseded.extend(document_id for document_id in previous_ids if document_id not in written_ids)
+            content_hash = self._pending_hashes.pop(key, None) or self.content_hash(document)
+            self.entries[key] = {
+                "content_hash": content_hash,
+                "updated_at": document.meta.get("updated_at"),
+                "document_ids": written_ids,
+                "run_id": self.run_id,
+            }
+        return superseded
+
+    def missing_document_ids(self) -> List[str]:
+        """Document IDs of articles in the manifest that were not seen in this run."""
+        return [
+            document_id
+            for key, entry in self.entries.items()
+            if key not in self._seen
+            for document_id in entry.get("document_ids", [])
+        ]
+
+    def forget_missing(self) -> None:
+        """Drops manifest entries for articles not seen in this run."""
+        self.entries = {key: entry for key, entry in self.entries.items() if key in self._seen}
@@ -0,0 +1,89 @@
+# src/reranking.py
+
+import importlib.util
+import threading
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from haystack import component, Document
+
+# Loaded cross-encoders, shared by every reranker in the process.
+_MODELS: Dict[str, Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+def require_cross_encoder() -> None:
+    """
+    Raises a configuration error when reranking is enabled but
+    sentence-transformers is not installed; checked without importing it.
+    """
+    if importlib.util.find_spec("sentence_transformers") is None:
+        raise ValueError("RERANKER_ENABLED=true needs the sentence-transformers package (and torch), which is not "
+                         "installed. Install it with `pip install -r requirements.txt` or disable the reranker.")
+
+def load_cross_encoder(model_name: str) -> Any:
+    """
+    Returns a CPU `sentence_transformers.CrossEncoder`, loading it on first
+    use and caching it per process. The import itself is deferred too, since
+    torch alone adds seconds to startup.
+    """
+    with _MODELS_LOCK:
+        if model_name not in _MODELS:
+            from sentence_transformers import CrossEncoder
+
+            start = time.perf_counter()
+            _MODELS[model_name] = CrossEncoder(model_name, device="cpu")
+            print(f"Loaded reranker '{model_name}' in {time.perf_counter() - start:.1f}s.")
+        return _MODELS[model_name]
+
+def rerank_text(document: Document) -> str:
+    title = (document.meta or {}).get("title")
+    return f"{title}\n{document.content or ''}" if title else document.content or ""
+
+@component
+class CrossEncoderReranker:
+    """
+    Reorders retrieved candidates by scoring each (query, document) pair with
+    a cross-encoder, and keeps the best `top_k`. Pairs are scored on the CPU
+    in batches of `batch_size` (one forward pass when all candidates fit).
+    `max_latency_ms` is enforced between batches: the first batch always
+    runs, and the rest are skipped once the next one, expected to take as
+    long as the slowest so far, would overrun the budget. Skipped candidates
+    follow the scored ones in their retrieval order. The budget can only
+    take effect when the candidates span several batches. Without a
+    `model_name` it only truncates to `top_k`.
+    """
+    def __init__(self, model_name: Optional[str], top_k: int = 3, batch_size: int = 32, max_latency_ms: float = 0.0):
+        self.model_name = model_name
+        self.top_k = top_k
+        self.batch_size = max(1, batch_size)
+        self.max_latency_ms = max_latency_ms
+
+    def warm_up(self) -> None:
+        if self.model_name:
+            load_cross_encoder(self.model_name)
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document], query: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
+        top_k = top_k or self.top_k
+        if not self.model_name or not query or len(documents) <= 1:
+            return {"documents": documents[:top_k]}
+
+        model = load_cross_encoder(self.model_name)
+        start = time.perf_counter()
+        scores: List[float] = []
+        slowest_batch = 0.0
+        for batch_start in range(0, len(documents), self.batch_size):
+            batch_started = time.perf_counter()
+            if self.max_latency_ms and scores and (batch_started - start + slowest_batch) * 1000 > self.max_latency_ms:
+                print(f"Reranker latency budget of {self.max_latency_ms:.0f} ms would be exceeded; "
+                      f"{len(documents) - len(scores)} of {len(documents)} candidates left unscored.")
+                break
+            batch = documents[batch_start:batch_start + self.batch_size]
+            pairs = [(query, rerank_text(document)) for document in batch]
+            scores.extend(float(score) for score in model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False))
+            slowest_batch = max(slowest_batch, time.perf_counter() - batch_started)
+
+        scored = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        reranked = [replace(documents[i], score=scores[i]) for i in scored] + documents[len(scores):]
+        return {"documents": reranked[:top_k]}
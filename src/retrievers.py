@@ -0,0 +1,209 @@
+# src/retrievers.py
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from haystack import component, Document
+from haystack.utils.filters import document_matches_filter
+
+from .keyword_index import BM25Index
+from .snapshot import CorpusSnapshot, iter_store_documents
+
+class NumpyVectorIndex:
+    """
+    An exact, in-process vector index for small corpora (hundreds to a few
+    thousand documents). L2-normalized embeddings live in one contiguous
+    matrix, so top-k cosine similarity is a single matrix-vector product.
+
+    `dtype="float16"` halves memory; scores are still accumulated in float32,
+    but without a BLAS kernel each query is several times slower.
+    """
+    BLOCK_ROWS = 512
+
+    def __init__(self, documents: List[Document], dtype: str = "float32", dimension: Optional[int] = None):
+        embedded = [document for document in documents if document.embedding is not None]
+        if len(embedded) != len(documents):
+            print(f"NumpyVectorIndex: skipping {len(documents) - len(embedded)} documents without embeddings.")
+        # Embeddings are held in the matrix only; keep lightweight Document copies for results.
+        self.documents = [replace(document, embedding=None, score=None) for document in embedded]
+        if embedded:
+            matrix = np.asarray([document.embedding for document in embedded], dtype=np.float32)
+        else:
+            matrix = np.zeros((0, dimension or 0), dtype=np.float32)
+        self.matrix = np.ascontiguousarray(self._normalize(matrix).astype(dtype, copy=False))
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CorpusSnapshot, dtype: str = "float32") -> "NumpyVectorIndex":
+        """
+        Wraps a `CorpusSnapshot` without copying: its embeddings are already
+        normalized, so a float32 index uses the memory-mapped matrix directly.
+        """
+        index = cls.__new__(cls)
+        index.documents = snapshot.documents
+        index.matrix = snapshot.embeddings if dtype == "float32" else np.ascontiguousarray(snapshot.embeddings, dtype=dtype)
+        return index
+
+    @classmethod
+    def from_document_store(cls, document_store: Any, dtype: str = "float32") -> "NumpyVectorIndex":
+        """
+        Loads every document (with its embedding) from a document store, page
+        by page (see `iter_store_documents`), converting each page's
+        embeddings into a block of the matrix as it arrives.
+        """
+        documents, blocks, skipped = [], [], 0
+        for page in iter_store_documents(document_store):
+            embedded = [document for document in page if document.embedding is not None]
+            skipped += len(page) - len(embedded)
+            if embedded:
+                documents.extend(replace(document, embedding=None, score=None) for document in embedded)
+                matrix = np.asarray([document.embedding for document in embedded], dtype=np.float32)
+                blocks.append(cls._normalize(matrix).astype(dtype, copy=False))
+        if skipped:
+            print(f"NumpyVectorIndex: skipping {skipped} documents without embeddings.")
+        print(f"NumpyVectorIndex: loaded {len(documents)} documents from the document store.")
+        index = cls.__new__(cls)
+        index.documents = documents
+        index.matrix = np.ascontiguousarray(np.concatenate(blocks)) if blocks else np.zeros((0, 0), dtype=dtype)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        if self.matrix.dtype == np.float32:
+            return self.matrix.dot(query)
+        # NumPy has no BLAS kernel for float16, so upcast cache-sized row blocks
+        # and accumulate in float32 instead of multiplying in half precision.
+        scores = np.empty(len(self.matrix), dtype=np.float32)
+        for start in range(0, len(self.matrix), self.BLOCK_ROWS):
+            block = self.matrix[start:start + self.BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32).dot(query)
+        return scores
+
+    def search(self, query_embedding: List[float], top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Returns the `top_k` most similar documents with cosine similarity as `score`."""
+        if not len(self.documents) or top_k <= 0:
+            return []
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+        scores = self._scores(query)
+        if filters:
+            mask = np.fromiter((document_matches_filter(filters, document) for document in self.documents),
+                               dtype=bool, count=len(self.documents))
+            scores = np.where(mask, scores, -np.inf)
+            top_k = min(top_k, int(mask.sum()))
+            if top_k == 0:
+                return []
+
+        k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [replace(self.documents[i], score=float(scores[i])) for i in ranked]
+
+
+@component
+class NumpyEmbeddingRetriever:
+    """
+    Drop-in replacement for `PineconeEmbeddingRetriever` backed by a
+    `NumpyVectorIndex`: same `query_embedding` input and `documents` output,
+    but no network round trip per query.
+    """
+    def __init__(self, index: NumpyVectorIndex, top_k: int = 10):
+        self.index = index
+        self.top_k = top_k
+
+    @component.output_types(documents=List[Document])
+    def run(self, query_embedding: List[float], filters: Optional[Dict[str, Any]] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
+        return {"documents": self.index.search(query_embedding, top_k or self.top_k, filters)}
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], top_k: int, k: int = 60) -> List[Document]:
+    """
+    Merges ranked lists by reciprocal rank fusion: each document scores
+    `sum(1 / (k + rank))` over the lists it appears in. Raw scores are
+    ignored, so cosine similarities and BM25 scores need no calibration.
+    The first occurrence of a document supplies the returned object.
+    """
+    fused: Dict[str, float] = {}
+    first_seen: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            fused[document.id] = fused.get(document.id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(document.id, document)
+    ranked = sorted(fused, key=lambda doc_id: fused[doc_id], reverse=True)[:top_k]
+    return [replace(first_seen[doc_id], score=fused[doc_id]) for doc_id in ranked]
+
+
+@dataclass(frozen=True)
+class KeywordCorpus:
+    """A BM25 index and the documents its rows refer to; replaced as one object on reload."""
+    index: BM25Index
+    documents: List[Document]
+
+
+@component
+class HybridRetriever:
+    """
+    Runs a dense retriever and a BM25 keyword search side by side and merges
+    them with reciprocal rank fusion, so exact terms (feature names, menu
+    labels, providers like "WePay") are found even when embeddings miss them.
+    Each side contributes its best `candidates`; `top_k` fused documents are
+    returned. Without a `query` or a `keyword_index` it simply passes through
+    the dense retriever's results, so the pipeline's inputs never change.
+    Fused scores are ranks, not similarities, so the best dense similarity is
+    reported separately as `top_score`. `set_keyword_index` swaps the keyword
+    side while queries are running; each search reads it once. Keyword
+    searches run on a pool of `max_workers` threads shared by all queries;
+    size it to the number of concurrent queries so they do not queue.
+    """
+    def __init__(self, dense_retriever: Any, keyword_index: Optional[BM25Index], documents: List[Document],
+                 top_k: int = 10, candidates: int = 20, rrf_k: int = 60, max_workers: int = 1):
+        self.dense_retriever = dense_retriever
+        self.keyword_corpus = KeywordCorpus(keyword_index, documents) if keyword_index is not None else None
+        self.top_k = top_k
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="keyword-search")
+
+    def set_keyword_index(self, keyword_index: Optional[BM25Index], documents: List[Document]) -> None:
+        """Replaces the keyword index and its documents in one assignment."""
+        self.keyword_corpus = KeywordCorpus(keyword_index, documents) if keyword_index is not None else None
+
+    def keyword_search(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None,
+                       corpus: Optional[KeywordCorpus] = None) -> List[Document]:
+        # Row IDs are only meaningful against the documents they were built
+        # from, so both come from one snapshot of `keyword_corpus`.
+        corpus = corpus or self.keyword_corpus
+        if corpus is None:
+            return []
+        mask = None
+        if filters:
+            mask = np.fromiter((document_matches_filter(filters, document) for document in corpus.documents),
+                               dtype=bool, count=len(corpus.documents))
+        return [replace(corpus.documents[row], score=score) for row, score in corpus.index.search(query, top_k, mask)]
+
+    @staticmethod
+    def _top_score(documents: List[Document]) -> Optional[float]:
+        scores = [document.score for document in documents if document.score is not None]
+        return max(scores) if scores else None
+
+    @component.output_types(documents=List[Document], top_score=Optional[float])
+    def run(self, query_embedding: List[float], query: Optional[str] = None,
+            filters: Optional[Dict[str, Any]] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
+        top_k = top_k or self.top_k
+        corpus = self.keyword_corpus
+        if not query or corpus is None:
+            dense = self.dense_retriever.run(query_embedding=query_embedding, filters=filters, top_k=top_k)["documents"]
+            return {"documents": dense, "top_score": self._top_score(dense)}
+        # The keyword search is CPU-only; overlap it with the dense call, which is usually a network round trip.
+        keyword_future = self._executor.submit(self.keyword_search, query, self.candidates, filters, corpus)
+        dense = self.dense_retriever.run(query_embedding=query_embedding, filters=filters, top_k=self.candidates)["documents"]
+        fused = reciprocal_rank_fusion([dense, keyword_future.result()], top_k, self.rrf_k)
+        return {"documents": fused, "top_score": self._top_score(dense)}
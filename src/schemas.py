@@ -1,7 +1,7 @@
 # src/schemas.py
 
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 # --- 1. CORE RAG RESPONSE SCHEMA ---
 # This defines the structured JSON output from our RAG pipeline.
@@ -10,6 +10,10 @@ class RAGResponse(BaseModel):
     answer: str
     references: List[str]
 
+# The canonical answer when the context does not contain one. The prompt asks
+# the model for exactly this text, and the no-answer gate returns it directly.
+NO_ANSWER_MESSAGE = "I could not find a relevant answer in the provided documents."
+
 
 # --- 2. API REQUEST/RESPONSE SCHEMAS ---
 # These models are used by FastAPI for request validation and response formatting.
@@ -17,11 +21,36 @@ class RAGResponse(BaseModel):
 class QueryRequest(BaseModel):
     """The expected input for the /query endpoint."""
     query: str
+    # Overrides the server's CONTEXT_TOKEN_BUDGET for this request.
+    max_context_tokens: Optional[int] = Field(default=None, ge=1)
 
 class UpdateResponse(BaseModel):
-    """The success response for the /update-articles endpoint."""
+    """The outcome of an /update-articles indexing job."""
     message: str
     documents_processed: int
+    documents_indexed: int = 0
+    documents_skipped: int = 0
+    documents_deleted: int = 0
+
+class JobAcceptedResponse(BaseModel):
+    """The response for an upload accepted by /update-articles; poll `status_url` for progress."""
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusResponse(BaseModel):
+    """Progress of a background indexing job, returned by /jobs/{job_id}."""
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    articles_parsed: int = 0
+    articles_skipped: int = 0  # unchanged since the last run
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    result: Optional[UpdateResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 
 # --- 3. UPLOADED DATA VALIDATION SCHEMAS ---
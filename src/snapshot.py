@@ -0,0 +1,357 @@
+# src/snapshot.py
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from haystack import Document
+
+from .keyword_index import BM25Index
+
+# Bump when the on-disk layout changes; older snapshots are then ignored.
+SNAPSHOT_FORMAT_VERSION = 1
+
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+KEYWORD_INDEX_FILE = "keywords.npz"
+# Pinecone's `list` returns at most 100 IDs per page.
+STORE_PAGE_SIZE = 100
+# Rows copied at a time when a snapshot is written.
+COPY_BLOCK_ROWS = 4096
+
+class CorpusSnapshot:
+    """
+    A versioned, on-disk snapshot of the embedded corpus, stored as a directory:
+
+    - `header.json`: format version, generation counter, model, dimension, count
+    - `embeddings.npy`: L2-normalized float32 matrix, one row per document,
+      loaded with `mmap_mode="r"` so opening it costs no copy
+    - `documents.jsonl`: id, content and meta per line, in row order
+    - `keywords.npz`: a BM25 inverted index over the same rows
+
+    Lets retrieval backends start serving without calling Pinecone or Bedrock.
+    """
+    def __init__(self, path: Path, header: Dict[str, Any], documents: List[Document], embeddings: np.ndarray):
+        self.path = Path(path)
+        self.header = header
+        self.documents = documents
+        self.embeddings = embeddings
+
+    @property
+    def generation(self) -> int:
+        return self.header["generation"]
+
+    def load_keyword_index(self) -> BM25Index:
+        """Returns the snapshot's BM25 index, building it if the snapshot predates it."""
+        index = BM25Index.load(self.path / KEYWORD_INDEX_FILE)
+        if index is None or len(index) != len(self.documents):
+            index = BM25Index.build(self.documents)
+        return index
+
+    @classmethod
+    def load(cls, path: Path, model: Optional[str] = None, dimension: Optional[int] = None, mmap: bool = True) -> Optional["CorpusSnapshot"]:
+        """
+        Opens a snapshot, memory-mapping the embeddings. Returns None if it is
+        missing, has an unknown format version, or was built for a different
+        model or dimension.
+        """
+        path = Path(path)
+        header = read_header(path, model, dimension)
+        if header is None:
+            return None
+
+        embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode="r" if mmap else None)
+        documents = list(_read_documents(path / DOCUMENTS_FILE))
+        if len(documents) != embeddings.shape[0]:
+            print(f"Ignoring corrupt snapshot at {path}: {len(documents)} documents but {embeddings.shape[0]} embeddings.")
+            return None
+        return cls(path, header, documents, embeddings)
+
+    @staticmethod
+    def write(path: Path, documents: Iterable[Document], model: str, dimension: int, generation: int = 1) -> Dict[str, Any]:
+        """
+        Writes a new snapshot of `documents` (those without an embedding are
+        skipped) atomically and returns its header.
+        """
+        with SnapshotStaging(path, dimension) as staging:
+            staging.add(documents)
+            rows = staging.rows()
+            keep = [(0, row) for row in range(len(rows))]
+            return _write_rows(path, [rows], keep, model, dimension, generation)
+
+def read_header(path: Path, model: Optional[str] = None, dimension: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns the header of the snapshot at `path`, or None if it is missing,
+    has an unknown format version, or was built for a different model or
+    dimension.
+    """
+    header_path = Path(path) / HEADER_FILE
+    if not header_path.exists():
+        return None
+    with open(header_path, "r", encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        print(f"Ignoring snapshot at {path} with unsupported format version {header.get('format_version')}.")
+        return None
+    if (model and header.get("model") != model) or (dimension and header.get("dimension") != dimension):
+        print(f"Ignoring snapshot at {path} built for {header.get('model')} ({header.get('dimension')} dims).")
+        return None
+    return header
+
+def _read_documents(path: Path) -> Iterator[Document]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield Document(id=record["id"], content=record["content"], meta=record["meta"])
+
+def _normalized(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(embeddings / norms, dtype=np.float32)
+
+class _SnapshotRows:
+    """
+    Read access to rows laid out like a snapshot: a `documents.jsonl` file
+    and a matching embeddings matrix (usually memory-mapped). Only the IDs
+    and line offsets are kept in memory; records are read back on demand.
+    """
+    def __init__(self, documents_path: Path, embeddings: np.ndarray):
+        self.embeddings = embeddings
+        self.ids: List[str] = []
+        self._offsets: List[int] = []
+        self._file = open(documents_path, "rb")
+        offset = 0
+        for line in self._file:
+            self.ids.append(json.loads(line)["id"])
+            self._offsets.append(offset)
+            offset += len(line)
+        if len(self.ids) != embeddings.shape[0]:
+            self.close()
+            raise ValueError(f"{documents_path} has {len(self.ids)} documents but {embeddings.shape[0]} embeddings.")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def line(self, row: int) -> bytes:
+        self._file.seek(self._offsets[row])
+        return self._file.readline()
+
+    def close(self) -> None:
+        self._file.close()
+        self.embeddings = None
+
+class SnapshotStaging:
+    """
+    Scratch space next to the snapshot at `path` for the documents an
+    indexing run embeds. Each batch is appended to disk as normalized float32
+    rows and jsonl records, so a run only holds one batch in memory however
+    many documents it indexes. Use as a context manager; the directory is
+    removed on exit.
+    """
+    EMBEDDINGS_FILE = "embeddings.f32"
+
+    def __init__(self, path: Path, dimension: int):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix=path.name + ".staging-", dir=path.parent))
+        self.dimension = dimension
+        self.count = 0
+        self._embeddings = open(self.directory / self.EMBEDDINGS_FILE, "wb")
+        self._documents = open(self.directory / DOCUMENTS_FILE, "w", encoding="utf-8")
+        self._rows: Optional[_SnapshotRows] = None
+
+    def add(self, documents: Iterable[Document]) -> None:
+        """Appends the documents that have an embedding."""
+        documents = [document for document in documents if document.embedding is not None]
+        if not documents:
+            return
+        _normalized(np.asarray([document.embedding for document in documents], dtype=np.float32)).tofile(self._embeddings)
+        for document in documents:
+            record = {"id": document.id, "content": document.content, "meta": document.meta}
+            self._documents.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += len(documents)
+
+    def rows(self) -> _SnapshotRows:
+        """Returns the staged rows for reading; call once all documents are added."""
+        self._embeddings.flush()
+        self._documents.flush()
+        if self.count:
+            embeddings = np.memmap(self.directory / self.EMBEDDINGS_FILE, dtype=np.float32, mode="r",
+                                   shape=(self.count, self.dimension))
+        else:
+            embeddings = np.zeros((0, self.dimension), dtype=np.float32)
+        self._rows = _SnapshotRows(self.directory / DOCUMENTS_FILE, embeddings)
+        return self._rows
+
+    def close(self) -> None:
+        if self._rows is not None:
+            self._rows.close()
+        self._embeddings.close()
+        self._documents.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "SnapshotStaging":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def _write_rows(path: Path, sources: List[_SnapshotRows], keep: List[Tuple[int, int]], model: str, dimension: int, generation: int) -> Dict[str, Any]:
+    """
+    Writes a snapshot whose rows are `keep`, (source, row) pairs into
+    `sources`, copying embeddings and records across in blocks. Files go to
+    a temporary directory that replaces the old snapshot in one rename, so
+    readers never see a mix. Returns the new header.
+    """
+    path = Path(path)
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "generation": generation,
+        "model": model,
+        "dimension": dimension,
+        "count": len(keep),
+        "created_at": time.time(),
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    if keep:
+        embeddings = np.lib.format.open_memmap(tmp_path / EMBEDDINGS_FILE, mode="w+", dtype=np.float32, shape=(len(keep), dimension))
+        plan = np.asarray(keep, dtype=np.int64)
+        for start in range(0, len(plan), COPY_BLOCK_ROWS):
+            block = plan[start:start + COPY_BLOCK_ROWS]
+            target = embeddings[start:start + len(block)]
+            for source_index, source in enumerate(sources):
+                mask = block[:, 0] == source_index
+                if mask.any():
+                    target[mask] = source.embeddings[block[mask, 1]]
+        embeddings.flush()
+        del embeddings, target
+    else:
+        np.save(tmp_path / EMBEDDINGS_FILE, np.zeros((0, dimension), dtype=np.float32))
+    with open(tmp_path / DOCUMENTS_FILE, "wb") as f:
+        for source_index, row in keep:
+            f.write(sources[source_index].line(row))
+    # The old snapshot may be one of the sources; release it before replacing it.
+    for source in sources:
+        source.close()
+    BM25Index.build(_read_documents(tmp_path / DOCUMENTS_FILE)).save(tmp_path / KEYWORD_INDEX_FILE)
+    # The header goes last: a directory without one is never loaded.
+    with open(tmp_path / HEADER_FILE, "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+
+    old_path = path.with_name(path.name + ".old")
+    if path.exists():
+        if old_path.exists():
+            shutil.rmtree(old_path)
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if old_path.exists():
+        shutil.rmtree(old_path, ignore_errors=True)
+    print(f"Wrote corpus snapshot generation {generation} with {len(keep)} documents to {path}.")
+    return header
+
+def _document_from_vector(document_store: Any, vector: Any) -> Document:
+    """Converts a fetched Pinecone vector the way PineconeDocumentStore converts query matches."""
+    metadata = dict(vector.metadata or {})
+    content = metadata.pop("content", None)
+    values = list(vector.values or [])
+    # Documents written without an embedding are stored with a placeholder vector.
+    embedding = values if values and values != document_store._dummy_vector else None
+    return Document(id=vector.id, content=content, meta=document_store._convert_meta_to_int(metadata), embedding=embedding)
+
+def iter_store_documents(document_store: Any, page_size: int = STORE_PAGE_SIZE) -> Iterator[List[Document]]:
+    """
+    Yields every document of `document_store`, embeddings included, a page at
+    a time. `PineconeDocumentStore.filter_documents` is a similarity query
+    capped at 1,000 results that only logs a warning when it truncates, so a
+    Pinecone index is paged through by ID with `list_paginated` and `fetch`
+    instead. (`Index.list` yields bare ID lists in the pinned pinecone 7.x
+    and `ListResponse` pages in later releases; `list_paginated` returns a
+    `ListResponse` in both.) Other stores are read with `filter_documents()`.
+    """
+    from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
+
+    if not isinstance(document_store, PineconeDocumentStore):
+        yield document_store.filter_documents()
+        return
+    document_store._initialize_index()
+    index, namespace = document_store._index, document_store.namespace
+    pagination_token = None
+    while True:
+        page = index.list_paginated(namespace=namespace, limit=page_size, pagination_token=pagination_token)
+        ids = [item.id for item in page.vectors]
+        if ids:
+            vectors = index.fetch(ids=ids, namespace=namespace).vectors
+            yield [_document_from_vector(document_store, vectors[i]) for i in ids if i in vectors]
+        pagination_token = page.pagination.next if page.pagination else None
+        if not pagination_token:
+            return
+
+def update_snapshot(
+    path: Path,
+    upserted: Union[SnapshotStaging, Iterable[Document]],
+    deleted_ids: Iterable[str],
+    model: str,
+    dimension: int,
+    document_store: Any = None,
+    rebuild: bool = False,
+    complete: bool = False,
+) -> Dict[str, Any]:
+    """
+    Applies an indexing run to the snapshot: upserted documents replace (or
+    are appended to) existing rows and deleted IDs are dropped. `upserted` is
+    the run's `SnapshotStaging` or any iterable of documents. Rows are copied
+    from disk to disk, so memory holds their IDs but not their embeddings.
+
+    - `complete` (a full run that re-embedded every document): the snapshot
+      is built from `upserted` alone.
+    - No snapshot yet, or `rebuild` (a resumed run whose earlier batches this
+      process never saw): `upserted` is laid over every document read back
+      from `document_store`. The store may not yet return vectors written
+      moments ago, so this run's own documents always win.
+    """
+    with ExitStack() as stack:
+        if not isinstance(upserted, SnapshotStaging):
+            staging = stack.enter_context(SnapshotStaging(path, dimension))
+            staging.add(upserted)
+            upserted = staging
+        deleted = set(deleted_ids)
+        header = read_header(path, model, dimension)
+        generation = header["generation"] + 1 if header is not None else 1
+
+        base = None
+        if complete:
+            pass
+        elif document_store is not None and (header is None or rebuild):
+            print("Building the corpus snapshot from the document store...")
+            store_staging = stack.enter_context(SnapshotStaging(path, dimension))
+            for page in iter_store_documents(document_store):
+                store_staging.add(page)
+            base = store_staging.rows()
+        elif header is not None:
+            base = _SnapshotRows(Path(path) / DOCUMENTS_FILE, np.load(Path(path) / EMBEDDINGS_FILE, mmap_mode="r"))
+
+        staged = upserted.rows()
+        # The last staged version of a document wins; it takes the place of
+        # the existing row, and new documents are appended in staging order.
+        latest = {document_id: row for row, document_id in enumerate(staged.ids)}
+        sources, keep = [staged], []
+        if base is not None:
+            sources.append(base)
+            for row, document_id in enumerate(base.ids):
+                if document_id in deleted:
+                    continue
+                staged_row = latest.pop(document_id, None)
+                keep.append((0, staged_row) if staged_row is not None else (1, row))
+        keep.extend((0, row) for document_id, row in latest.items() if document_id not in deleted)
+        return _write_rows(path, sources, keep, model, dimension, generation)
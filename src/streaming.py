@@ -0,0 +1,193 @@
+# src/streaming.py
+
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from haystack import Pipeline
+from haystack.dataclasses import StreamingChunk
+
+from .pipelines import build_query_inputs, extract_rag_result
+from .schemas import RAGResponse
+
+logger = logging.getLogger(__name__)
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class StopGeneration(Exception):
+    """Raised from a streaming callback to end generation once the reply is complete."""
+
+
+class IncrementalJsonParser:
+    """
+    A push parser for a `{"answer": ..., "references": [...]}` reply that
+    arrives in arbitrary chunks. Each `feed` is linear in the chunk size and
+    returns the newly decoded part of the top-level `answer` string, so the
+    answer can be shown while it is generated. Anything before the first `{`
+    is ignored; once the matching `}` arrives `complete` is set (so generation
+    can stop early) and later input is ignored. `result()` parses and
+    validates the object against `RAGResponse`.
+    """
+    def __init__(self):
+        self.raw: List[str] = []          # the object's text, from '{' to the matching '}'
+        self.complete = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape: Optional[str] = None  # pending escape sequence, e.g. "u00e"
+        self._pending_high_surrogate: Optional[int] = None
+        self._expect_key = False
+        self._key: Optional[List[str]] = None  # characters of the top-level key being read
+        self._current_key: Optional[str] = None
+        self._in_answer = False
+        self.answer: List[str] = []
+
+    def _emit(self, text: str, out: List[str]) -> None:
+        if self._in_answer:
+            self.answer.append(text)
+            out.append(text)
+        elif self._key is not None:
+            self._key.append(text)
+
+    def _decode_escape(self, out: List[str]) -> None:
+        sequence = self._escape
+        if sequence[0] != "u":
+            self._escape = None
+            self._emit(_SIMPLE_ESCAPES.get(sequence, sequence), out)
+            return
+        if len(sequence) < 5:
+            return
+        self._escape = None
+        code = int(sequence[1:], 16)
+        if 0xD800 <= code < 0xDC00:
+            self._pending_high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._pending_high_surrogate is not None:
+            code = 0x10000 + ((self._pending_high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._pending_high_surrogate = None
+        self._emit(chr(code), out)
+
+    def feed(self, chunk: str) -> str:
+        """Consumes the next piece of the reply and returns new answer text ("" if none)."""
+        out: List[str] = []
+        for char in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+            self.raw.append(char)
+
+            if self._in_string:
+                if self._escape is not None:
+                    self._escape += char
+                    self._decode_escape(out)
+                elif char == "\\":
+                    self._escape = ""
+                elif char == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._current_key = "".join(self._key)
+                        self._key = None
+                    self._in_answer = False
+                else:
+                    self._emit(char, out)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key = []
+                    self._expect_key = False
+                elif self._depth == 1 and self._current_key == "answer":
+                    self._in_answer = True
+            elif char in "{[":
+                self._depth += 1
+                self._expect_key = char == "{" and self._depth == 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                self._expect_key = True
+                self._current_key = None
+        return "".join(out)
+
+    def result(self) -> Dict[str, Any]:
+        """The complete reply, validated against `RAGResponse`. Raises if it is incomplete or invalid."""
+        if not self.complete:
+            raise json.JSONDecodeError("The JSON object is not complete.", "".join(self.raw), len(self.raw))
+        return RAGResponse(**json.loads("".join(self.raw))).model_dump()
+
+def format_sse(event: str, data: Any) -> str:
+    """Serializes one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+_DONE = object()
+
+def stream_rag_answer(rag_pipeline: Pipeline, query: str, max_context_tokens: Optional[int] = None,
+                      executor: Optional[Executor] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Runs the RAG pipeline on a worker thread (from `executor` if given, so it
+    counts against the API's query concurrency) with Bedrock response streaming
+    and yields `(event, data)` pairs as they become available:
+
+    - `answer`: `{"delta": "..."}` pieces of the answer text, in order
+    - `references`: the list of referenced titles
+    - `result`: the final, validated `RAGResponse`
+    - `error`: `{"detail": "..."}` if the pipeline failed (details are logged)
+
+    Generation is stopped as soon as the reply's JSON object is complete.
+    Answers from the no-answer gate arrive as a single `answer` delta.
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+    parser = IncrementalJsonParser()
+
+    def on_chunk(chunk: StreamingChunk) -> None:
+        delta = parser.feed(chunk.content or "")
+        if delta:
+            events.put(("answer", {"delta": delta}))
+        if parser.complete:
+            # The closing brace arrived; anything the model adds after it is discarded anyway.
+            raise StopGeneration()
+
+    def worker() -> None:
+        try:
+            inputs = build_query_inputs(query, max_context_tokens=max_context_tokens, streaming_callback=on_chunk)
+            try:
+                result = extract_rag_result(rag_pipeline.run(inputs))
+            except Exception:
+                if not parser.complete:
+                    raise
+                result = parser.result()
+            events.put(("done", result))
+        except Exception as e:
+            logger.error(f"Error during streamed query processing: {e}")
+            events.put(("error", {"detail": "Sorry, an internal error occurred while processing your request."}))
+        finally:
+            events.put(_DONE)
+
+    if executor is not None:
+        executor.submit(worker)
+    else:
+        threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = events.get()
+        if item is _DONE:
+            return
+        event, data = item
+        if event != "done":
+            yield event, data
+            continue
+        # The validated answer is authoritative; send whatever the stream did not already show.
+        streamed = "".join(parser.answer)
+        if data["answer"].startswith(streamed):
+            remainder = data["answer"][len(streamed):]
+            if remainder:
+                yield "answer", {"delta": remainder}
+        yield "references", data["references"]
+        yield "result", data
@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+@pytest.fixture
+def fake_paged_index():
+    """Builds a Pinecone index stand-in whose `list_paginated` pages through the given IDs like the pinned SDK."""
+    def build(ids, page_size=100):
+        def list_paginated(namespace, limit, pagination_token=None):
+            start = int(pagination_token or 0)
+            end = start + min(limit, page_size)
+            pagination = SimpleNamespace(next=str(end)) if end < len(ids) else None
+            return SimpleNamespace(vectors=[SimpleNamespace(id=i) for i in ids[start:end]], pagination=pagination)
+        index = MagicMock()
+        index.list_paginated.side_effect = list_paginated
+        return index
+    return build
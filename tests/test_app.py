@@ -1,11 +1,19 @@
 # tests/test_app.py
 
+import asyncio
+import json
+import os
+import time
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
 # Import the FastAPI app instance from your app.py
-from app import app 
+import app as app_module
+from app import app
+from src.caching import QueryEmbeddingCache
 
 # Create a synchronous TestClient for our FastAPI app
 client = TestClient(app)
@@ -26,6 +34,28 @@ def test_query_endpoint_success():
     assert response.status_code == 200
     assert response.json()["answer"] == "This is a mock answer."
 
+def test_query_endpoint_runs_queries_concurrently():
+    """
+    Tests that blocking pipeline runs happen off the event loop, so concurrent queries overlap.
+    """
+    def slow_run(data):
+        time.sleep(0.3)
+        return {"parser": {"result": {"answer": "ok", "references": []}}}
+
+    async def send_queries(count):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.post("/query", json={"query": f"Question {i}"}) for i in range(count)))
+
+    with patch("app.RAG_PIPELINE") as mock_pipeline:
+        mock_pipeline.run.side_effect = slow_run
+        start = time.perf_counter()
+        responses = asyncio.run(send_queries(4))
+        elapsed = time.perf_counter() - start
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert elapsed < 0.9
+
 def test_query_endpoint_empty_query():
     """
     Tests that the API correctly returns a 400 Bad Request for an empty query.
@@ -34,20 +64,140 @@ def test_query_endpoint_empty_query():
     assert response.status_code == 400
     assert "Query cannot be empty" in response.json()["detail"]
 
+def wait_for_job(response, timeout=5.0):
+    """Polls the job accepted in `response` until it finishes and returns its final status."""
+    assert response.status_code == 202
+    status_url = response.json()["status_url"]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(status_url).json()
+        if status["status"] in ("succeeded", "failed"):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Job {status_url} did not finish within {timeout}s.")
+
 def test_update_articles_endpoint_success():
     """
-    Tests a successful file upload to the /update-articles endpoint.
+    Tests that an upload is accepted as a background job that reports progress and its result.
     """
     fake_json_content = '[{"id": 1, "title": "Test", "folders": [{"articles": [{"id": 1, "title": "Test"}]}]}]'
-    with patch("app.process_json_data") as mock_process:
-        with patch("app.build_indexing_pipeline") as mock_build_pipeline:
-            mock_process.return_value = [MagicMock()]
-            mock_build_pipeline.return_value = MagicMock()
-            files = {"file": ("test.json", fake_json_content, "application/json")}
-            response = client.post("/update-articles", files=files)
+    def fake_index(document_store, documents, progress=None, **kwargs):
+        documents = list(documents)
+        assert [d.meta["article_id"] for d in documents] == [1]
+        progress("embedded", len(documents))
+        progress("written", len(documents))
+        return {"indexed": 1, "skipped": 0, "deleted": 0}
 
-    assert response.status_code == 200
-    assert "Successfully indexed 1 documents" in response.json()["message"]
+    with patch("app.index_documents", side_effect=fake_index) as mock_index, patch("app.IndexManifest"):
+        files = {"file": ("test.json", fake_json_content, "application/json")}
+        response = client.post("/update-articles", files=files)
+        assert response.json()["status"] in ("queued", "running")
+        status = wait_for_job(response)
+
+    assert status["status"] == "succeeded"
+    assert "Successfully indexed 1 documents" in status["result"]["message"]
+    assert (status["articles_parsed"], status["chunks_embedded"], status["chunks_written"]) == (1, 1, 1)
+    assert status["finished_at"] >= status["started_at"] >= status["created_at"]
+    # Partial uploads must never delete articles unless explicitly asked to.
+    assert mock_index.call_args.kwargs["delete_missing"] is False
+
+def test_update_articles_endpoint_reports_skipped_documents():
+    """
+    Tests that unchanged articles reported by the manifest are surfaced in the job result.
+    """
+    fake_json_content = '[{"category_name": "Test", "folders": [{"articles": [{"id": 1, "title": "Test"}]}]}]'
+    with patch("app.index_documents") as mock_index, patch("app.IndexManifest"):
+        mock_index.return_value = {"indexed": 0, "skipped": 1, "deleted": 2}
+        files = {"file": ("test.json", fake_json_content, "application/json")}
+        status = wait_for_job(client.post("/update-articles?prune=true", files=files))
+
+    assert status["result"]["documents_skipped"] == 1
+    assert status["result"]["documents_deleted"] == 2
+    assert mock_index.call_args.kwargs["delete_missing"] is True
+
+def test_update_articles_endpoint_enforces_upload_size_limit(tmp_path):
+    """
+    Tests that uploads over MAX_UPLOAD_BYTES are refused with 413 and leave no spooled file behind.
+    """
+    files = {"file": ("big.json", "[" + " " * 2048 + "]", "application/json")}
+    with patch("app.config.MAX_UPLOAD_BYTES", 1024), patch("app.config.UPLOAD_CHUNK_BYTES", 256), \
+         patch("app.tempfile.tempdir", str(tmp_path)), patch("app.INDEXING_JOBS") as mock_jobs:
+        response = client.post("/update-articles", files=files)
+    assert response.status_code == 413
+    mock_jobs.submit.assert_not_called()
+    assert list(tmp_path.iterdir()) == []
+
+def test_update_articles_rejects_oversized_content_length_before_parsing_the_form():
+    """
+    Tests that a body whose Content-Length is over the limit gets a 413 without the form being parsed.
+    """
+    files = {"file": ("big.json", "[" + " " * 4096 + "]", "application/json")}
+    with patch("app.config.MAX_UPLOAD_BYTES", 1024), patch("app.config.UPLOAD_FORM_OVERHEAD_BYTES", 256), \
+         patch("starlette.requests.Request.form") as mock_form, patch("app.INDEXING_JOBS") as mock_jobs:
+        response = client.post("/update-articles", files=files)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "The upload exceeds the limit of 1024 bytes."}
+    mock_form.assert_not_called()
+    mock_jobs.submit.assert_not_called()
+
+def test_update_articles_stops_reading_a_chunked_body_over_the_limit(tmp_path):
+    """
+    Tests that a body sent without Content-Length is cut off with a 413 once it passes the limit,
+    before the endpoint runs.
+    """
+    def body():
+        yield b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="big.json"\r\n' \
+              b'Content-Type: application/json\r\n\r\n['
+        for _ in range(64):
+            yield b" " * 256
+        yield b']\r\n--boundary--\r\n'
+    with patch("app.config.MAX_UPLOAD_BYTES", 1024), patch("app.config.UPLOAD_FORM_OVERHEAD_BYTES", 256), \
+         patch("app.tempfile.tempdir", str(tmp_path)), patch("app.spool_upload") as mock_spool, \
+         patch("app.INDEXING_JOBS") as mock_jobs:
+        response = client.post("/update-articles", content=body(),
+                               headers={"Content-Type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
+    mock_spool.assert_not_called()
+    mock_jobs.submit.assert_not_called()
+    assert list(tmp_path.iterdir()) == []
+
+def test_update_articles_streams_upload_into_batched_indexing():
+    """
+    Tests that the upload is parsed lazily into index_documents and the spooled file is removed afterwards.
+    """
+    articles = [{"id": i, "title": f"Article {i}"} for i in range(1, 6)]
+    content = json.dumps([{"category_name": "C", "folders": [{"folder_name": "F", "articles": articles}]}])
+    seen = {}
+    def fake_index(document_store, documents, progress=None, **kwargs):
+        seen["lazy"] = not isinstance(documents, list)
+        seen["ids"] = [d.id for d in documents]
+        return {"indexed": len(seen["ids"]), "skipped": 0, "deleted": 0}
+
+    with patch("app.index_documents", side_effect=fake_index), patch("app.IndexManifest"), \
+         patch("app.os.unlink", wraps=os.unlink) as mock_unlink:
+        status = wait_for_job(client.post("/update-articles", files={"file": ("export.json", content, "application/json")}))
+
+    assert status["status"] == "succeeded"
+    assert seen == {"lazy": True, "ids": ["1", "2", "3", "4", "5"]}
+    assert status["articles_parsed"] == status["result"]["documents_processed"] == 5
+    assert not os.path.exists(mock_unlink.call_args.args[0])
+
+def test_jobs_endpoint_unknown_job():
+    """
+    Tests that polling an unknown job ID returns 404.
+    """
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+def test_update_articles_endpoint_refuses_uploads_when_queue_is_full():
+    """
+    Tests that uploads are refused with 429 while the maximum number of jobs is pending.
+    """
+    from src.jobs import JobQueueFull
+    with patch("app.INDEXING_JOBS") as mock_jobs:
+        mock_jobs.submit.side_effect = JobQueueFull("8 indexing jobs are already queued or running.")
+        files = {"file": ("test.json", "[]", "application/json")}
+        response = client.post("/update-articles", files=files)
+    assert response.status_code == 429
 
 def test_update_articles_endpoint_wrong_file_type():
     """
@@ -75,46 +225,147 @@ def test_query_endpoint_handles_pipeline_exception():
 
 def test_update_articles_endpoint_handles_indexing_failure():
     """
-    Ensures the API returns a 500 error if the indexing process fails.
+    Ensures the job is marked as failed with the error if the indexing process fails.
     """
     fake_json_content = '[{"folders": [{"articles": [{"id": 1, "title": "Test"}]}]}]'
-    with patch("app.process_json_data") as mock_process:
-        with patch("app.build_indexing_pipeline") as mock_build_pipeline:
-            mock_process.return_value = [MagicMock()]
-            mock_pipeline_instance = MagicMock()
-            mock_pipeline_instance.run.side_effect = Exception("Pinecone connection failed!")
-            mock_build_pipeline.return_value = mock_pipeline_instance
-            files = {"file": ("test.json", fake_json_content, "application/json")}
-            response = client.post("/update-articles", files=files)
+    with patch("app.index_documents") as mock_index, patch("app.IndexManifest"):
+        mock_index.side_effect = Exception("Pinecone connection failed!")
+        files = {"file": ("test.json", fake_json_content, "application/json")}
+        status = wait_for_job(client.post("/update-articles", files=files))
 
-    assert response.status_code == 500
-    assert "An internal error occurred" in response.json()["detail"]
+    assert status["status"] == "failed"
+    assert status["error"] == "Pinecone connection failed!"
+    assert status["result"] is None
 
 def test_update_articles_invalid_json_content():
     """
-    Ensures the API returns a 400 error for a file that is JSON but has the wrong structure.
+    Ensures the job fails for a file that is JSON but has the wrong structure, or is not JSON at all.
     """
     # This content is valid JSON, but it's a dictionary, not a list of categories.
     invalid_structure_content = '{"error": "This is not the expected format"}'
     files = {"file": ("bad_structure.json", invalid_structure_content, "application/json")}
-    response = client.post("/update-articles", files=files)
+    assert wait_for_job(client.post("/update-articles", files=files))["status"] == "failed"
+
+    files = {"file": ("truncated.json", '[{"category_name": ', "application/json")}
+    status = wait_for_job(client.post("/update-articles", files=files))
+    assert status["status"] == "failed"
+    assert "Invalid JSON format" in status["error"]
+
+def test_update_articles_reports_indexing_json_errors_unchanged():
+    """
+    Tests that a JSONDecodeError from a backend during indexing is not reported as a malformed upload.
+    """
+    content = '[{"category_name": "C", "folders": [{"articles": [{"id": 1, "title": "A"}]}]}]'
+    def fake_index(document_store, documents, **kwargs):
+        list(documents)
+        raise json.JSONDecodeError("Expecting value", "<html>502</html>", 0)
 
-    assert response.status_code == 500 # The current code throws a 500 for this
-    assert "An internal error occurred" in response.json()["detail"]
+    with patch("app.index_documents", side_effect=fake_index), patch("app.IndexManifest"):
+        status = wait_for_job(client.post("/update-articles", files={"file": ("export.json", content, "application/json")}))
+    assert status["status"] == "failed"
+    assert status["error"].startswith("Expecting value")
 
 
 def test_update_articles_no_valid_documents():
     """
-    Ensures the API returns a 400 error if the uploaded JSON contains no processable documents.
+    Ensures the job fails if the uploaded JSON contains no processable documents.
     """
     # This content is structurally valid, but the articles are missing 'id' and will be filtered out.
     content_no_valid_docs = '[{"category_name": "Test", "folders": [{"articles": [{"title": "No ID here"}]}]}]'
     
     # We don't need to mock here because we want to test the real data processor's output
-    with patch("app.build_indexing_pipeline"): # Still mock the pipeline to prevent Pinecone call
+    with patch("app.index_documents") as mock_index: # Still mock indexing to prevent Pinecone call
         files = {"file": ("no_valid_docs.json", content_no_valid_docs, "application/json")}
-        response = client.post("/update-articles", files=files)
+        status = wait_for_job(client.post("/update-articles", files=files))
 
-    assert response.status_code == 400
-    assert "No valid documents found" in response.json()["detail"]
+    assert status["status"] == "failed"
+    assert "No valid documents found" in status["error"]
+    mock_index.assert_not_called()
+
+
+def test_cache_stats_endpoint_reports_query_cache():
+    """
+    Tests that the query embedding cache statistics are exposed by the API.
+    """
+    with patch("app.RAG_PIPELINE") as mock_pipeline:
+        mock_pipeline.get_component.return_value.cache = QueryEmbeddingCache("test-model")
+        response = client.get("/cache-stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is True
+    assert {"hits", "misses", "hit_rate", "size"} <= set(body)
+
+def test_query_endpoint_passes_context_budget():
+    """
+    Tests that a per-request max_context_tokens reaches the prompt engine and invalid values are rejected.
+    """
+    mock_response = {"parser": {"result": {"answer": "ok", "references": []}}, "prompt_engine": {"dropped_tokens": 12}}
+    with patch("app.RAG_PIPELINE") as mock_pipeline:
+        mock_pipeline.run.return_value = mock_response
+        response = client.post("/query", json={"query": "A question", "max_context_tokens": 500})
+        assert mock_pipeline.run.call_args.args[0]["prompt_engine"] == {"query": "A question", "max_context_tokens": 500}
+    assert response.status_code == 200
+    assert client.post("/query", json={"query": "A question", "max_context_tokens": 0}).status_code == 422
+
+def test_query_stream_endpoint_sends_server_sent_events():
+    """
+    Tests that /query/stream responds with an event stream ending in the validated result.
+    """
+    events = [("answer", {"delta": "Mock "}), ("answer", {"delta": "answer."}),
+              ("references", ["Mock Doc"]), ("result", {"answer": "Mock answer.", "references": ["Mock Doc"]})]
+    with patch("app.RAG_PIPELINE"), patch("app.stream_rag_answer", return_value=iter(events)):
+        response = client.post("/query/stream", json={"query": "A valid question"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.count("event: answer") == 2
+    assert response.text.endswith('event: result\ndata: {"answer": "Mock answer.", "references": ["Mock Doc"]}\n\n')
+    assert client.post("/query/stream", json={"query": " "}).status_code == 400
+
+
+# --- Startup, Warm-Up and Health Checks ---
+
+def test_import_does_not_build_services():
+    """
+    Tests that importing the app leaves Pinecone and Bedrock untouched until the server starts.
+    """
+    assert app_module.RAG_PIPELINE is None and app_module.document_store is None
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+    assert client.post("/query", json={"query": "Too early"}).status_code == 503
+
+def test_lifespan_builds_pipeline_and_reports_ready_after_warm_up():
+    """
+    Tests that startup builds the pipeline and /readyz turns 200 with the warm-up timings once it succeeds.
+    """
+    with patch("app.PineconeDocumentStore"), patch("app.build_rag_pipeline") as mock_build, \
+         patch("app.warm_up_rag_pipeline", return_value={"embedding": 0.5}) as mock_warm_up, \
+         patch.dict(app_module.READINESS), patch("app.RAG_PIPELINE"), patch("app.document_store"):
+        with TestClient(app) as started_client:
+            assert app_module.RAG_PIPELINE is mock_build.return_value
+            deadline = time.monotonic() + 5
+            while started_client.get("/readyz").status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            body = started_client.get("/readyz").json()
+        mock_warm_up.assert_called_once_with(mock_build.return_value)
+
+    assert body["ready"] is True
+    assert body["warm_up"] == {"embedding": 0.5}
+    assert body["time_to_ready_seconds"] > 0
+
+def test_failed_warm_up_keeps_app_not_ready():
+    """
+    Tests that a failing warm-up leaves /readyz at 503 while /healthz stays up.
+    """
+    with patch("app.PineconeDocumentStore"), patch("app.build_rag_pipeline"), \
+         patch("app.warm_up_rag_pipeline", side_effect=Exception("Bedrock unreachable")), \
+         patch.dict(app_module.READINESS), patch("app.RAG_PIPELINE"), patch("app.document_store"):
+        with TestClient(app) as started_client:
+            deadline = time.monotonic() + 5
+            while app_module.READINESS["error"] is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            response = started_client.get("/readyz")
+            assert started_client.get("/healthz").status_code == 200
 
+    assert response.status_code == 503
+    assert response.json()["error"] == "Warm-up failed."
@@ -0,0 +1,123 @@
+# tests/test_caching.py
+
+import pytest
+from haystack import Document
+
+from src.caching import CachedDocumentEmbedder, CachedTextEmbedder, EmbeddingCache, QueryEmbeddingCache
+
+class FakeEmbedder:
+    """Stands in for AmazonBedrockDocumentEmbedder and records every text it embeds."""
+    def __init__(self):
+        self.embedded_texts = []
+
+    def run(self, documents):
+        for document in documents:
+            self.embedded_texts.append(document.content)
+            document.embedding = [float(len(document.content)), 0.5, -1.0]
+        return {"documents": documents}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", model="test-model", dimension=3)
+    yield cache
+    cache.close()
+
+def test_only_cache_misses_reach_the_embedder(cache):
+    """
+    Tests that a second run over the same content makes zero embedding calls.
+    """
+    fake = FakeEmbedder()
+    embedder = CachedDocumentEmbedder(fake, cache)
+    documents = [Document(id="1", content="alpha"), Document(id="2", content="beta")]
+    first = embedder.run(documents=documents)["documents"]
+    assert fake.embedded_texts == ["alpha", "beta"]
+
+    # Metadata-only change: same content, new meta.
+    changed = [Document(id="1", content="alpha", meta={"title": "New"}), Document(id="3", content="gamma")]
+    second = embedder.run(documents=changed)["documents"]
+    assert fake.embedded_texts == ["alpha", "beta", "gamma"]
+    assert second[0].embedding == first[0].embedding
+    assert second[0].meta == {"title": "New"}
+    assert [d.id for d in second] == ["1", "3"]
+    assert cache.stats == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+def test_cache_persists_across_instances(tmp_path):
+    """
+    Tests that embeddings survive a process restart (a new cache on the same file).
+    """
+    path = tmp_path / "embeddings.sqlite3"
+    first_cache = EmbeddingCache(path, model="test-model", dimension=3)
+    first_cache.put_many(["alpha"], [[1.0, 2.0, 3.0]])
+    first_cache.close()
+
+    second_cache = EmbeddingCache(path, model="test-model", dimension=3)
+    assert second_cache.get_many(["alpha", "beta"]) == [[1.0, 2.0, 3.0], None]
+    second_cache.close()
+
+def test_cache_key_depends_on_model_dimension_and_normalized_text(cache):
+    """
+    Tests that whitespace-only edits share an entry while model/dimension changes do not.
+    """
+    other_model = EmbeddingCache(cache.path, model="other-model", dimension=3)
+    other_dimension = EmbeddingCache(cache.path, model="test-model", dimension=256)
+    assert cache.key("Hello   world\n") == cache.key("Hello world")
+    assert cache.key("Hello world") != other_model.key("Hello world")
+    assert cache.key("Hello world") != other_dimension.key("Hello world")
+    other_model.close()
+    other_dimension.close()
+
+
+# --- Tests for the query embedding cache ---
+
+class FakeTextEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, text):
+        self.calls += 1
+        return {"embedding": [0.1, 0.2, float(len(text))]}
+
+def test_repeated_queries_skip_the_embedder():
+    """
+    Tests that normalized repeats of a question are served from the cache.
+    """
+    fake = FakeTextEmbedder()
+    embedder = CachedTextEmbedder(fake, QueryEmbeddingCache(model="test-model"))
+    first = embedder.run(text="How do I change my account details?")["embedding"]
+    second = embedder.run(text="  how do I change my   account details?")["embedding"]
+    assert fake.calls == 1
+    assert second == first
+    assert embedder.cache.stats["hits"] == 1
+    assert embedder.cache.stats["hit_rate"] == 0.5
+
+def test_query_cache_evicts_least_recently_used():
+    """
+    Tests that the cache never grows past max_size and drops the oldest unused entry.
+    """
+    cache = QueryEmbeddingCache(model="test-model", max_size=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]  # "a" is now most recently used
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.stats["size"] == 2
+
+def test_query_cache_entries_expire_after_ttl():
+    """
+    Tests TTL expiry using an injected clock.
+    """
+    now = [0.0]
+    cache = QueryEmbeddingCache(model="test-model", ttl_seconds=10, clock=lambda: now[0])
+    cache.put("question", [1.0])
+    now[0] = 9.0
+    assert cache.get("question") == [1.0]
+    now[0] = 11.0
+    assert cache.get("question") is None
+    assert cache.stats["size"] == 0
+
+def test_query_cache_is_keyed_on_model():
+    """
+    Tests that embeddings from different models are never mixed up.
+    """
+    assert QueryEmbeddingCache(model="a").key("q") != QueryEmbeddingCache(model="b").key("q")
@@ -0,0 +1,57 @@
+# tests/test_chunking.py
+
+import pytest
+from haystack import Document
+
+from src.chunking import DocumentChunker, approx_token_count
+
+def make_long_doc(n_words=25, article_id=42):
+    content = " ".join(f"w{i}" for i in range(n_words))
+    return Document(id=str(article_id), content=content, meta={"article_id": article_id, "title": "Long Article"})
+
+def test_short_documents_pass_through_unchanged():
+    """
+    Tests that a document within the chunk size keeps its ID, content and meta.
+    """
+    doc = Document(id="7", content="A short article.", meta={"article_id": 7, "title": "Short"})
+    chunks = DocumentChunker(chunk_tokens=10, overlap_tokens=2).run(documents=[doc])["documents"]
+    assert chunks == [doc]
+
+def test_long_documents_are_split_with_overlap():
+    """
+    Tests chunk sizes, overlap and that every token is covered.
+    """
+    chunks = DocumentChunker(chunk_tokens=10, overlap_tokens=3).split(make_long_doc(25))
+    words = [chunk.content.split() for chunk in chunks]
+    assert all(len(w) <= 10 for w in words)
+    for previous, current in zip(words, words[1:]):
+        assert previous[-3:] == current[:3]
+    covered = {word for w in words for word in w}
+    assert covered == {f"w{i}" for i in range(25)}
+    assert words[-1][-1] == "w24"
+
+def test_chunk_ids_and_meta_are_deterministic():
+    """
+    Tests that chunk IDs derive from article_id and are identical across runs.
+    """
+    chunker = DocumentChunker(chunk_tokens=10, overlap_tokens=2)
+    first = chunker.split(make_long_doc(25))
+    second = chunker.split(make_long_doc(25))
+    assert [c.id for c in first] == [c.id for c in second] == [f"42_{i}" for i in range(len(first))]
+    assert all(c.meta["title"] == "Long Article" and c.meta["parent_id"] == "42" for c in first)
+    assert [c.meta["chunk_index"] for c in first] == list(range(len(first)))
+    assert all(c.meta["chunk_count"] == len(first) for c in first)
+
+def test_chunker_rejects_invalid_overlap():
+    """
+    Tests that an overlap as large as the chunk size is rejected.
+    """
+    with pytest.raises(ValueError):
+        DocumentChunker(chunk_tokens=10, overlap_tokens=10)
+
+def test_approx_token_count():
+    """
+    Tests that words and punctuation are counted as separate tokens.
+    """
+    assert approx_token_count("Hello, world!") == 4
+    assert approx_token_count("") == 0
@@ -0,0 +1,91 @@
+# tests/test_compression.py
+
+from unittest.mock import MagicMock
+
+import pytest
+from haystack import Document
+
+from src.chunking import sentence_spans
+from src.compression import ContextCompressor
+
+# Toy 3-d embeddings: axis 0 = payments, axis 1 = accounts, axis 2 = other.
+VECTORS = {"WePay": [1.0, 0.0, 0.0], "password": [0.0, 1.0, 0.0]}
+
+def fake_embedder():
+    def run(documents):
+        embedded = []
+        for document in documents:
+            vector = next((v for word, v in VECTORS.items() if word in document.content), [0.0, 0.0, 1.0])
+            embedded.append(Document(content=document.content, embedding=vector))
+        return {"documents": embedded}
+    embedder = MagicMock()
+    embedder.run.side_effect = run
+    return embedder
+
+ARTICLE = (
+    "Our billing area has many options. Connect WePay under Settings. "
+    "Invoices are sent monthly. You can export reports as CSV. "
+    "WePay payouts arrive in two days. Contact support for anything else."
+)
+
+def test_sentence_spans_split_on_terminal_punctuation():
+    """
+    Tests that sentence spans cover each sentence without the separating whitespace.
+    """
+    text = "One. Two!  Three? Four"
+    assert [text[a:b] for a, b in sentence_spans(text)] == ["One.", "Two!", "Three?", "Four"]
+
+def test_compressor_keeps_relevant_sentences_in_order():
+    """
+    Tests that the sentences closest to the query are kept in document order, with meta untouched.
+    """
+    embedder = fake_embedder()
+    document = Document(content=ARTICLE, meta={"title": "Billing", "tags": ["wepay"]})
+    result = ContextCompressor("embedding", embedder, keep_ratio=0.4, min_sentences=2).run(documents=[document], query_embedding=[1.0, 0.0, 0.0])
+
+    compressed = result["documents"][0]
+    assert compressed.content == "Connect WePay under Settings. WePay payouts arrive in two days."
+    assert compressed.meta == {"title": "Billing", "tags": ["wepay"]}
+    assert result["compression_ratio"] <= 0.5
+    embedder.run.assert_called_once()
+
+def test_compressor_embeds_all_documents_in_one_call_and_skips_short_ones():
+    """
+    Tests that sentences of every document are embedded together and short documents pass through.
+    """
+    embedder = fake_embedder()
+    short = Document(content="Reset your password. Then log in.")
+    documents = [Document(content=ARTICLE), short, Document(content=ARTICLE.replace("WePay", "password"))]
+    result = ContextCompressor("embedding", embedder, keep_ratio=0.3, min_sentences=2).run(documents=documents, query_embedding=[0.0, 1.0, 0.0])
+
+    assert embedder.run.call_count == 1
+    assert len(embedder.run.call_args.kwargs["documents"]) == 12
+    assert result["documents"][1] is short
+    assert "password" in result["documents"][2].content
+
+def test_lexical_compressor_keeps_matching_sentences_without_embedding():
+    """
+    Tests that the lexical scorer keeps the sentences sharing the question's terms, with no embedding calls.
+    """
+    document = Document(content=ARTICLE, meta={"title": "Billing"})
+    result = ContextCompressor("lexical", keep_ratio=0.4, min_sentences=2).run(
+        documents=[document], query_embedding=[1.0, 0.0, 0.0], query="How do I connect WePay?")
+    assert result["documents"][0].content == "Connect WePay under Settings. WePay payouts arrive in two days."
+    assert result["documents"][0].meta == {"title": "Billing"}
+
+def test_compressor_rejects_unknown_scorer():
+    """
+    Tests that a misconfigured scorer fails when the pipeline is built.
+    """
+    with pytest.raises(ValueError, match="Unknown compression scorer"):
+        ContextCompressor("semantic")
+    with pytest.raises(ValueError, match="needs an embedder"):
+        ContextCompressor("embedding")
+
+def test_compressor_without_embedder_passes_through():
+    """
+    Tests that a disabled compressor leaves documents unchanged.
+    """
+    documents = [Document(content=ARTICLE)]
+    result = ContextCompressor(None).run(documents=documents, query_embedding=[1.0, 0.0, 0.0])
+    assert result == {"documents": documents, "compression_ratio": 1.0}
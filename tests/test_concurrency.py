@@ -0,0 +1,178 @@
+# tests/test_concurrency.py
+
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from haystack import Document
+
+from src.concurrency import AdaptiveConcurrencyLimiter, BatchedDocumentWriter, ConcurrentDocumentEmbedder, TokenBucket, is_throttling_error
+
+class FakeEmbedder:
+    """A thread-safe stand-in for AmazonBedrockDocumentEmbedder with configurable latency and throttling."""
+    def __init__(self, latency=0.0, throttle_first=0):
+        self.latency = latency
+        self.throttle_remaining = throttle_first
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def run(self, documents):
+        with self.lock:
+            if self.throttle_remaining > 0:
+                self.throttle_remaining -= 1
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "InvokeModel")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        for document in documents:
+            document.embedding = [float(document.id)]
+        return {"documents": documents}
+
+def make_docs(n):
+    return [Document(id=str(i), content=f"doc {i}") for i in range(n)]
+
+def test_output_order_matches_input_order():
+    """
+    Tests that concurrently embedded documents come back in their original order.
+    """
+    embedder = ConcurrentDocumentEmbedder(FakeEmbedder(latency=0.01), max_concurrency=8)
+    result = embedder.run(documents=make_docs(40))["documents"]
+    assert [d.id for d in result] == [str(i) for i in range(40)]
+    assert [d.embedding for d in result] == [[float(i)] for i in range(40)]
+
+def test_concurrency_is_bounded():
+    """
+    Tests that no more than max_concurrency requests are ever in flight.
+    """
+    fake = FakeEmbedder(latency=0.02)
+    ConcurrentDocumentEmbedder(fake, max_concurrency=3).run(documents=make_docs(12))
+    assert 1 < fake.max_in_flight <= 3
+
+def test_throttling_is_retried_and_reduces_concurrency():
+    """
+    ADVANCED TEST: ThrottlingExceptions are retried and halve the concurrency limit.
+    """
+    fake = FakeEmbedder(throttle_first=2)
+    embedder = ConcurrentDocumentEmbedder(fake, max_concurrency=8, backoff_seconds=0.001)
+    result = embedder.run(documents=make_docs(5))["documents"]
+    assert [d.embedding for d in result] == [[float(i)] for i in range(5)]
+    assert embedder.limiter.throttle_count == 2
+    assert embedder.limiter.limit < 8
+
+def test_non_throttling_errors_are_raised():
+    """
+    Tests that other failures are not retried.
+    """
+    class BrokenEmbedder:
+        def run(self, documents):
+            raise ValueError("bad input")
+    with pytest.raises(ValueError):
+        ConcurrentDocumentEmbedder(BrokenEmbedder(), max_concurrency=2).run(documents=make_docs(2))
+
+def test_is_throttling_error_walks_the_cause_chain():
+    """
+    Tests detection of throttling wrapped in another exception, as the Bedrock components do.
+    """
+    cause = ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "InvokeModel")
+    try:
+        try:
+            raise cause
+        except ClientError as e:
+            raise RuntimeError("Could not perform inference") from e
+    except RuntimeError as wrapped:
+        assert is_throttling_error(wrapped)
+    assert not is_throttling_error(ValueError("other"))
+
+def test_token_bucket_limits_rate():
+    """
+    Tests that the token bucket sleeps once the burst capacity is used up.
+    """
+    now = [0.0]
+    sleeps = []
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert sleeps == pytest.approx([0.1, 0.1])
+
+def test_adaptive_limiter_recovers_after_successes():
+    """
+    Tests the additive increase after a multiplicative decrease.
+    """
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, increase_after=2)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == 6
+
+
+# --- Tests for the batched, parallel writer ---
+
+class FakeDocumentStore:
+    """Records every upsert and can fail a given batch a number of times."""
+    def __init__(self, failures=None, latency=0.0):
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def write_documents(self, documents, policy):
+        first_id = documents[0].id
+        with self.lock:
+            if self.failures.get(first_id, 0) > 0:
+                self.failures[first_id] -= 1
+                raise ConnectionError(f"upsert starting at {first_id} timed out")
+        time.sleep(self.latency)
+        with self.lock:
+            self.writes.append([d.id for d in documents])
+        return len(documents)
+
+def test_writer_splits_into_batches_and_writes_everything():
+    """
+    Tests that every document is written exactly once, in batches of at most batch_size.
+    """
+    store = FakeDocumentStore(latency=0.01)
+    result = BatchedDocumentWriter(store, batch_size=4, max_concurrency=3).run(documents=make_docs(10))
+    assert result["documents_written"] == 10
+    assert sorted(len(batch) for batch in store.writes) == [2, 4, 4]
+    assert sorted(i for batch in store.writes for i in batch) == sorted(str(i) for i in range(10))
+    assert [stats["batch"] for stats in result["batch_stats"]] == [0, 1, 2]
+    assert all(stats["latency_seconds"] > 0 for stats in result["batch_stats"])
+
+def test_writer_retries_failed_batches_individually():
+    """
+    Tests that a flaky batch is retried on its own while the others are written once.
+    """
+    store = FakeDocumentStore(failures={"4": 2})
+    result = BatchedDocumentWriter(store, batch_size=4, max_retries=3, backoff_seconds=0.001).run(documents=make_docs(12))
+    assert result["documents_written"] == 12
+    assert len(store.writes) == 3
+    assert [stats["attempts"] for stats in result["batch_stats"]] == [1, 3, 1]
+
+def test_writer_raises_when_a_batch_keeps_failing():
+    """
+    Tests that exhausting the retries surfaces an error naming the failed batch.
+    """
+    store = FakeDocumentStore(failures={"0": 10})
+    writer = BatchedDocumentWriter(store, batch_size=4, max_retries=1, backoff_seconds=0.001)
+    with pytest.raises(RuntimeError, match="batch 0"):
+        writer.run(documents=make_docs(8))
+    assert store.writes == [["4", "5", "6", "7"]]
+
+def test_writer_initializes_the_index_once_before_parallel_writes():
+    """
+    Tests that a lazily connecting store is initialized once, before any batch is written.
+    """
+    store = FakeDocumentStore(latency=0.01)
+    calls = []
+    store._initialize_index = lambda: calls.append(len(store.writes))
+    BatchedDocumentWriter(store, batch_size=2, max_concurrency=4).run(documents=make_docs(8))
+    assert calls == [0]
+    assert len(store.writes) == 4
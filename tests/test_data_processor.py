@@ -1,10 +1,16 @@
 # tests/test_data_processor.py
 
+import io
+import json
+from pathlib import Path
+
 import pytest
+from bs4 import BeautifulSoup
 from haystack import Document
 
 # This allows the test script to find the 'src' package
-from src.data_processor import process_json_data
+from src.data_processor import process_json_data, load_and_process_data, stream_documents, batched, clean_text
+from src.json_stream import iter_articles
 
 def test_process_json_data_happy_path():
     """
@@ -172,3 +178,100 @@ def test_process_json_data_with_complex_structure():
     doc_ids = sorted([doc.id for doc in processed_documents])
     assert doc_ids == ["101", "102", "201"]
 
+
+# --- Tests for streaming ingestion ---
+
+def test_stream_documents_matches_load_and_process_data():
+    """
+    Tests that streaming the full export yields exactly the same documents, in the
+    same order, as loading it all at once.
+    """
+    file_path = Path("data/final_4dcrm_articles_clean.json")
+    expected = load_and_process_data(file_path)
+    streamed = list(stream_documents(file_path))
+    assert [doc.id for doc in streamed] == [doc.id for doc in expected]
+    assert [doc.content for doc in streamed] == [doc.content for doc in expected]
+    assert [doc.meta for doc in streamed] == [doc.meta for doc in expected]
+
+def test_iter_articles_handles_tiny_chunks():
+    """
+    ADVANCED TEST: Values split across read boundaries (including bare numbers) must
+    be reassembled correctly.
+    """
+    sample_data = [
+        {"category_id": 1, "category_name": "Billing", "folders": [
+            {"folder_name": "Payments", "articles": [{"id": 123456789, "title": "WePay"}, {"id": 2, "title": "Stripe"}]},
+            {"folder_name": "Empty", "articles": []},
+        ]},
+        {"category_name": "No Folders", "folders": []},
+    ]
+    stream = io.StringIO(json.dumps(sample_data, indent=2))
+    articles = list(iter_articles(stream, chunk_size=3))
+    assert articles == [
+        ("Billing", "Payments", {"id": 123456789, "title": "WePay"}),
+        ("Billing", "Payments", {"id": 2, "title": "Stripe"}),
+    ]
+
+def test_iter_articles_rejects_malformed_json():
+    """
+    Tests that a truncated export raises a JSONDecodeError instead of silently stopping.
+    """
+    stream = io.StringIO('[{"category_name": "Broken", "folders": [{"articles": [{"id": 1')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_articles(stream, chunk_size=4))
+
+def test_batched_groups_lazy_streams():
+    """
+    Tests that a generator is split into fixed-size batches with a smaller final batch.
+    """
+    documents = (Document(id=str(i), content=f"doc {i}") for i in range(5))
+    batches = list(batched(documents, 2))
+    assert [[doc.id for doc in batch] for batch in batches] == [["0", "1"], ["2", "3"], ["4"]]
+
+def test_process_json_data_parallel_matches_serial():
+    """
+    Tests that process-pool HTML cleaning keeps document order, IDs and content
+    identical to the serial path.
+    """
+    with open("data/final_4dcrm_articles_clean.json", "r", encoding="utf-8") as f:
+        json_data = json.load(f)
+    serial = process_json_data(json_data, workers=1)
+    parallel = process_json_data(json_data, workers=2, chunk_size=8)
+    assert [doc.id for doc in parallel] == [doc.id for doc in serial]
+    assert [doc.content for doc in parallel] == [doc.content for doc in serial]
+
+# --- Tests for the markup-aware fast path ---
+
+def test_clean_text_matches_beautifulsoup_on_corpus():
+    """
+    Tests that the fast path is byte-identical to a full BeautifulSoup parse for
+    every article in the real export.
+    """
+    with open("data/final_4dcrm_articles_clean.json", "r", encoding="utf-8") as f:
+        json_data = json.load(f)
+    for category in json_data:
+        for folder in category.get("folders", []):
+            for article in folder.get("articles", []):
+                raw_content = f"{article.get('title', '')}. {article.get('description_text', '')}"
+                expected = BeautifulSoup(raw_content, "html.parser").get_text().strip()
+                assert clean_text(raw_content) == expected
+
+@pytest.mark.parametrize("raw_content", [
+    "Plain title. Plain description with a bare & ampersand.",
+    "  Padded text\r\n with CRLF  ",
+    "<p>This is <b>bold</b> text.</p>",
+    "<p>One</p>\r\n<P >\tTwo</p>",
+    "Line<br/>break<br />and</br>old break",
+    "Fish &amp; Chips &lt;3",
+    "&paragraph is not a real entity",
+    '<a href="https://example.com">link</a> with <!-- comment -->',
+    "<script>var x = 1;</script>Visible",
+    "Math: 1 < 2 and 3 > 2",
+])
+def test_clean_text_matches_beautifulsoup_edge_cases(raw_content):
+    """
+    ADVANCED TEST: Near-plain inputs use the fast path, everything else falls back;
+    either way the output must equal BeautifulSoup's.
+    """
+    expected = BeautifulSoup(raw_content, "html.parser").get_text().strip()
+    assert clean_text(raw_content) == expected
@@ -0,0 +1,46 @@
+# tests/test_import_time.py
+
+import os
+import subprocess
+import sys
+
+# Integrations that must only be imported by the pipeline builders, never by
+# `import src.pipelines` itself (each pulls in boto3/aiobotocore or the Pinecone client).
+DEFERRED_MODULES = ("haystack_integrations", "boto3", "botocore", "aioboto3", "pinecone", "sentence_transformers", "torch")
+# Generous on purpose: Haystack alone takes ~0.4s here, the integrations
+# roughly doubled that, and torch would add seconds.
+IMPORT_TIME_BUDGET_SECONDS = 2.5
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def import_times(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter under `python -X importtime` and
+    returns the cumulative import time in seconds of every module it loaded.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+def test_pipelines_import_defers_heavy_integrations():
+    """
+    Tests that importing src.pipelines loads neither the Pinecone/Bedrock integrations nor boto3.
+    """
+    loaded = import_times("src.pipelines")
+    eager = sorted(name for name in loaded if name.split(".")[0] in DEFERRED_MODULES)
+    assert eager == []
+
+def test_pipelines_import_time_within_budget():
+    """
+    Tests that importing src.pipelines stays within the startup budget.
+    """
+    seconds = import_times("src.pipelines")["src.pipelines"]
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, f"import src.pipelines took {seconds:.2f}s"
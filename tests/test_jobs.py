@@ -0,0 +1,77 @@
+# tests/test_jobs.py
+
+import threading
+import time
+
+import pytest
+
+from src.jobs import JobManager, JobQueueFull
+
+def wait(job, timeout=5.0):
+    """Waits for `job` to finish and returns its status."""
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.to_dict()
+
+def test_job_reports_progress_and_result():
+    """
+    Tests that a job's counters and return value are recorded and it ends as succeeded.
+    """
+    manager = JobManager()
+    def target(job):
+        list(job.count_parsed(range(3)))
+        job.advance("skipped", 1)
+        job.advance("embedded", 4)
+        job.advance("written", 3)
+        return {"indexed": 3}
+
+    status = wait(manager.submit(target))
+    assert status["status"] == "succeeded"
+    assert (status["articles_parsed"], status["articles_skipped"]) == (3, 1)
+    assert (status["chunks_embedded"], status["chunks_written"]) == (4, 3)
+    assert status["result"] == {"indexed": 3}
+    assert status["error"] is None
+
+def test_failed_job_keeps_error_message():
+    """
+    Tests that an exception in the job marks it as failed with the exception's message.
+    """
+    manager = JobManager()
+    def target(job):
+        raise RuntimeError("embedding failed")
+
+    status = wait(manager.submit(target))
+    assert status["status"] == "failed"
+    assert status["error"] == "embedding failed"
+
+def test_submit_refuses_jobs_beyond_max_pending():
+    """
+    Tests that no more than `max_pending` jobs can be queued or running, and slots free up when they finish.
+    """
+    manager = JobManager(max_concurrency=1, max_pending=2)
+    release = threading.Event()
+    first = manager.submit(lambda job: release.wait())
+    manager.submit(lambda job: None)
+    with pytest.raises(JobQueueFull):
+        manager.submit(lambda job: None)
+
+    release.set()
+    assert wait(first)["status"] == "succeeded"
+    manager.submit(lambda job: None)
+    manager.shutdown()
+
+def test_only_recent_finished_jobs_are_kept():
+    """
+    Tests that finished jobs beyond `max_finished` are forgotten, oldest first.
+    """
+    manager = JobManager(max_finished=2)
+    jobs = []
+    for _ in range(4):
+        jobs.append(manager.submit(lambda job: None))
+        wait(jobs[-1])
+    manager.submit(lambda job: None)
+    manager.shutdown()
+
+    assert manager.get(jobs[0].id) is None and manager.get(jobs[1].id) is None
+    assert manager.get(jobs[3].id) is not None
@@ -0,0 +1,68 @@
+# tests/test_keyword_index.py
+
+import math
+
+import numpy as np
+from haystack import Document
+
+from src.keyword_index import BM25Index, document_text, tokenize
+
+def make_docs():
+    return [
+        Document(id="1", content="Connect WePay to accept card payments online.", meta={"title": "Payment providers", "tags": ["billing"]}),
+        Document(id="2", content="Change your password from the account menu.", meta={"title": "Account settings", "tags": []}),
+        Document(id="3", content="Invoices list every payment and refund.", meta={"title": "Invoices", "tags": ["billing", "refunds"]}),
+    ]
+
+def naive_bm25(documents, query, k1=1.2, b=0.75):
+    """Reference BM25 computed by scanning every document."""
+    tokenized = [tokenize(document_text(d)) for d in documents]
+    average = sum(len(t) for t in tokenized) / len(tokenized)
+    scores = []
+    for tokens in tokenized:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in t for t in tokenized)
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / average))
+        scores.append(score)
+    return scores
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    """
+    Tests that product names survive tokenization and matching is case-insensitive.
+    """
+    assert tokenize("Connect WePay (v2.0)!") == ["connect", "wepay", "v2", "0"]
+
+def test_bm25_scores_match_a_full_scan():
+    """
+    Tests that the precomputed postings give the same scores as a naive per-query scan.
+    """
+    documents = make_docs()
+    index = BM25Index.build(documents)
+    for query in ["wepay payments", "billing refunds", "account password menu", "unknown"]:
+        np.testing.assert_allclose(index.scores(query), naive_bm25(documents, query), rtol=1e-5)
+
+def test_bm25_search_indexes_titles_and_tags():
+    """
+    Tests that title and tag terms are searchable and non-matching documents are left out.
+    """
+    index = BM25Index.build(make_docs())
+    assert [row for row, _ in index.search("refunds", 5)] == [2]
+    assert [row for row, _ in index.search("WePay", 5)] == [0]
+    assert index.search("nothing matches", 5) == []
+    assert [row for row, _ in index.search("billing", 5, mask=np.array([True, False, False]))] == [0]
+
+def test_bm25_index_round_trips_through_disk(tmp_path):
+    """
+    Tests that a saved index loads back with identical scores.
+    """
+    index = BM25Index.build(make_docs())
+    index.save(tmp_path / "keywords.npz")
+    loaded = BM25Index.load(tmp_path / "keywords.npz")
+    assert len(loaded) == 3
+    np.testing.assert_array_equal(loaded.scores("payment billing"), index.scores("payment billing"))
+    assert BM25Index.load(tmp_path / "missing.npz") is None
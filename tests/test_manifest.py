@@ -0,0 +1,212 @@
+# tests/test_manifest.py
+
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+from haystack import Document
+
+from src.checkpoint import IndexingCheckpoint
+from src.chunking import DocumentChunker
+from src.manifest import IndexManifest
+from src.pipelines import index_documents
+
+def make_doc(article_id, content, updated_at="2024-01-01T00:00:00Z", title="Title"):
+    return Document(
+        id=str(article_id),
+        content=content,
+        meta={"article_id": article_id, "title": title, "tags": [], "updated_at": updated_at},
+    )
+
+def run_index(manifest, documents, delete_missing=True):
+    """Runs index_documents against mocked Bedrock/Pinecone and returns (stats, store, pipeline)."""
+    document_store = MagicMock()
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build:
+        pipeline = MagicMock()
+        mock_build.return_value = pipeline
+        stats = index_documents(document_store, documents, batch_size=2, manifest=manifest, delete_missing=delete_missing)
+    return stats, document_store, pipeline
+
+def embedded_ids(pipeline):
+    return [doc.id for call in pipeline.run.call_args_list for doc in call.args[0]["embedder"]["documents"]]
+
+def test_first_run_indexes_everything_and_persists(tmp_path):
+    """
+    Tests that an empty manifest indexes every document and is written to disk.
+    """
+    path = tmp_path / "manifest.json"
+    stats, _, pipeline = run_index(IndexManifest.load(path), [make_doc(1, "a"), make_doc(2, "b"), make_doc(3, "c")])
+    assert stats == {"indexed": 3, "skipped": 0, "deleted": 0}
+    assert embedded_ids(pipeline) == ["1", "2", "3"]
+    saved = json.loads(path.read_text())
+    assert set(saved["articles"]) == {"1", "2", "3"}
+    assert saved["articles"]["1"]["updated_at"] == "2024-01-01T00:00:00Z"
+
+def test_second_run_only_embeds_changed_articles(tmp_path):
+    """
+    Tests that unchanged articles are skipped and changed ones are re-embedded.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a"), make_doc(2, "b")])
+
+    stats, _, pipeline = run_index(IndexManifest.load(path), [make_doc(1, "a"), make_doc(2, "b changed")])
+    assert stats == {"indexed": 1, "skipped": 1, "deleted": 0}
+    assert embedded_ids(pipeline) == ["2"]
+
+def test_touched_but_unchanged_article_is_skipped(tmp_path):
+    """
+    Tests that a newer updated_at alone does not trigger re-embedding, but is recorded.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a")])
+    stats, _, _ = run_index(IndexManifest.load(path), [make_doc(1, "a", updated_at="2025-01-01T00:00:00Z")])
+    assert stats["skipped"] == 1
+    assert IndexManifest.load(path).entries["1"]["updated_at"] == "2025-01-01T00:00:00Z"
+
+def test_metadata_change_is_reindexed(tmp_path):
+    """
+    Tests that a changed title counts as a change even when the content is identical.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a")])
+    stats, _, _ = run_index(IndexManifest.load(path), [make_doc(1, "a", title="New Title")])
+    assert stats["indexed"] == 1
+
+def test_vanished_articles_are_bulk_deleted(tmp_path):
+    """
+    Tests that articles missing from a full export are deleted in a single call.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a"), make_doc(2, "b"), make_doc(3, "c")])
+    stats, document_store, _ = run_index(IndexManifest.load(path), [make_doc(1, "a")])
+    assert stats == {"indexed": 0, "skipped": 1, "deleted": 2}
+    document_store.delete_documents.assert_called_once_with(["2", "3"])
+    assert set(IndexManifest.load(path).entries) == {"1"}
+
+def test_partial_update_does_not_delete(tmp_path):
+    """
+    Tests that without delete_missing, absent articles are kept in the index and manifest.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a"), make_doc(2, "b")])
+    stats, document_store, _ = run_index(IndexManifest.load(path), [make_doc(3, "c")], delete_missing=False)
+    assert stats == {"indexed": 1, "skipped": 0, "deleted": 0}
+    document_store.delete_documents.assert_not_called()
+    assert set(IndexManifest.load(path).entries) == {"1", "2", "3"}
+
+def test_failed_batch_is_not_recorded(tmp_path):
+    """
+    ADVANCED TEST: If a batch fails to embed/write, it must be retried on the next run.
+    """
+    path = tmp_path / "manifest.json"
+    document_store = MagicMock()
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build:
+        pipeline = MagicMock()
+        pipeline.run.side_effect = [None, Exception("Throttled")]
+        mock_build.return_value = pipeline
+        with pytest.raises(Exception, match="Throttled"):
+            index_documents(document_store, [make_doc(i, str(i)) for i in range(4)], batch_size=2, manifest=IndexManifest.load(path))
+    assert set(IndexManifest.load(path).entries) == {"0", "1"}
+
+def test_article_growing_into_chunks_replaces_old_document(tmp_path):
+    """
+    ADVANCED TEST: When an article is split into chunks, its old single-document
+    vector is deleted and the manifest records the chunk IDs.
+    """
+    path = tmp_path / "manifest.json"
+    chunker = DocumentChunker(chunk_tokens=5, overlap_tokens=1)
+    document_store = MagicMock()
+    with patch("src.pipelines.build_indexing_pipeline"):
+        index_documents(document_store, [make_doc(1, "short")], manifest=IndexManifest.load(path), chunker=chunker)
+        long_content = "one two three four five six seven eight nine ten"
+        stats = index_documents(document_store, [make_doc(1, long_content)], batch_size=2, manifest=IndexManifest.load(path), chunker=chunker)
+
+    document_store.delete_documents.assert_called_once_with(["1"])
+    assert stats["deleted"] == 1
+    assert IndexManifest.load(path).entries["1"]["document_ids"] == ["1_0", "1_1", "1_2"]
+
+def test_progress_counts_chunks_and_skipped_articles(tmp_path):
+    """
+    Tests that progress reports embedded and written chunks, and unchanged articles as skipped.
+    """
+    path = tmp_path / "manifest.json"
+    chunker = DocumentChunker(chunk_tokens=5, overlap_tokens=1)
+    with patch("src.pipelines.build_indexing_pipeline"):
+        index_documents(MagicMock(), [make_doc(1, "a")], manifest=IndexManifest.load(path), chunker=chunker)
+
+    progress = {}
+    def record(stage, count):
+        progress[stage] = progress.get(stage, 0) + count
+    def run(data, **kwargs):
+        documents = data["embedder"]["documents"]
+        return {"embedder": {"documents": documents}, "writer": {"documents_written": len(documents)}}
+    long_content = "one two three four five six seven eight nine ten"
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build:
+        mock_build.return_value.run.side_effect = run
+        index_documents(MagicMock(), [make_doc(1, "a"), make_doc(2, long_content)], batch_size=2,
+                        manifest=IndexManifest.load(path), chunker=chunker, progress=record)
+    assert progress == {"skipped": 1, "embedded": 3, "written": 3}
+
+
+# --- Tests for checkpointed, resumable runs ---
+
+def test_interrupted_full_run_resumes_from_last_committed_batch(tmp_path):
+    """
+    ADVANCED TEST: A full re-index that dies mid-way only re-embeds the batches it had
+    not committed when resumed with the same run_id.
+    """
+    manifest_path = tmp_path / "manifest.json"
+    checkpoint_path = tmp_path / "checkpoint.json"
+    source = tmp_path / "export.json"
+    source.write_text("[]")
+    documents = [make_doc(i, f"content {i}") for i in range(6)]
+
+    # An earlier, completed run indexed everything.
+    run_index(IndexManifest.load(manifest_path), documents)
+
+    # A forced full run fails on its second batch.
+    checkpoint = IndexingCheckpoint.start(checkpoint_path, source, full=True)
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build:
+        pipeline = MagicMock()
+        pipeline.run.side_effect = [None, Exception("ExpiredTokenException")]
+        mock_build.return_value = pipeline
+        with pytest.raises(Exception, match="ExpiredToken"):
+            index_documents(
+                MagicMock(), documents, batch_size=2,
+                manifest=IndexManifest.load(manifest_path, run_id=checkpoint.run_id, force=True),
+                checkpoint=checkpoint,
+            )
+
+    saved = IndexingCheckpoint.load(checkpoint_path)
+    assert saved.run_id == checkpoint.run_id
+    assert saved.batches_committed == 1 and saved.documents_written == 2
+    assert saved.full is True and not saved.source_changed()
+
+    # Resume: only the four uncommitted documents are embedded again.
+    manifest = IndexManifest.load(manifest_path, run_id=saved.run_id, force=True)
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build:
+        pipeline = MagicMock()
+        mock_build.return_value = pipeline
+        stats = index_documents(MagicMock(), documents, batch_size=2, manifest=manifest, delete_missing=True, checkpoint=saved)
+    assert embedded_ids(pipeline) == ["2", "3", "4", "5"]
+    assert stats["skipped"] == 2 and stats["deleted"] == 0
+    assert IndexingCheckpoint.load(checkpoint_path) is None
+
+def test_forced_manifest_reindexes_unchanged_articles(tmp_path):
+    """
+    Tests that force=True re-embeds articles written by earlier runs.
+    """
+    path = tmp_path / "manifest.json"
+    run_index(IndexManifest.load(path), [make_doc(1, "a")])
+    stats, _, _ = run_index(IndexManifest.load(path, force=True), [make_doc(1, "a")])
+    assert stats["indexed"] == 1
+
+def test_checkpoint_requires_matching_manifest(tmp_path):
+    """
+    Tests that a checkpoint cannot be combined with a manifest from another run.
+    """
+    source = tmp_path / "export.json"
+    source.write_text("[]")
+    checkpoint = IndexingCheckpoint.start(tmp_path / "checkpoint.json", source, full=False)
+    with pytest.raises(ValueError):
+        index_documents(MagicMock(), [], manifest=IndexManifest.load(tmp_path / "m.json"), checkpoint=checkpoint)
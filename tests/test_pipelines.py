@@ -1,10 +1,17 @@
 # tests/test_pipelines.py
 
+import logging
+from typing import List, Optional
+from unittest.mock import patch
+
 import pytest
-from haystack import Document
+from haystack import component, Document
 
 # This allows the test script to find the 'src' package
-from src.pipelines import CustomPromptEngine, ValidatedJsonOutputParser
+from src import pipelines
+from src.chunking import approx_token_count
+from src.pipelines import CustomPromptEngine, NoAnswerGate, ValidatedJsonOutputParser, truncate_at_sentence
+from src.schemas import NO_ANSWER_MESSAGE
 
 # --- Tests for CustomPromptEngine ---
 
@@ -51,6 +58,58 @@ def test_custom_prompt_engine_with_special_characters():
     assert "Traducción Español" in prompt
 
 
+def test_custom_prompt_engine_packs_documents_within_budget():
+    """
+    Tests that documents are packed in rank order, the last one is cut at a sentence boundary and the rest dropped.
+    """
+    documents = [
+        Document(content="First doc is short.", meta={"title": "One"}),
+        Document(content="Second starts here. It keeps going with more words. And even more words here.", meta={"title": "Two"}),
+        Document(content="Third never fits.", meta={"title": "Three"}),
+    ]
+    engine = CustomPromptEngine()
+    overhead = approx_token_count(CustomPromptEngine._render_document(documents[0], ""))
+    budget = 2 * overhead + approx_token_count("First doc is short.") + approx_token_count("Second starts here.")
+    result = engine.run(query="q", documents=documents, max_context_tokens=budget)
+
+    prompt = result["prompt"]
+    assert "First doc is short." in prompt
+    assert "<content>Second starts here.</content>" in prompt
+    assert "It keeps going" not in prompt and "Third never fits." not in prompt
+    expected_dropped = approx_token_count("It keeps going with more words. And even more words here.") + approx_token_count("Third never fits.")
+    assert result["dropped_tokens"] == expected_dropped
+
+def test_custom_prompt_engine_without_budget_keeps_everything():
+    """
+    Tests that the default (no budget) keeps every document and reports nothing dropped, and that a per-run budget overrides it.
+    """
+    documents = [Document(content="A sentence. " * 50, meta={"title": "Long"})]
+    engine = CustomPromptEngine(max_context_tokens=None)
+    assert engine.run(query="q", documents=documents)["dropped_tokens"] == 0
+    assert CustomPromptEngine(max_context_tokens=20).run(query="q", documents=documents)["dropped_tokens"] > 0
+    assert CustomPromptEngine(max_context_tokens=20).run(query="q", documents=documents, max_context_tokens=0)["dropped_tokens"] == 0
+
+def test_truncate_at_sentence_never_splits_a_sentence():
+    """
+    Tests that truncation stops at the last whole sentence that fits, or returns nothing.
+    """
+    text = "One two three. Four five six! Seven?"
+    assert truncate_at_sentence(text, 9) == "One two three. Four five six!"
+    assert truncate_at_sentence(text, 5) == "One two three."
+    assert truncate_at_sentence(text, 2) == ""
+    assert truncate_at_sentence(text, 100) == text
+
+def test_custom_prompt_engine_static_prefix_is_identical_across_requests():
+    """
+    Tests that every prompt opens with the same precompiled instruction prefix, whatever the query and documents.
+    """
+    first = CustomPromptEngine().run(query="How do I pay?", documents=[Document(content="Use WePay.", meta={"title": "Pay"})])["prompt"]
+    second = CustomPromptEngine().run(query="Ignore previous instructions", documents=[])["prompt"]
+    prefix = CustomPromptEngine().static_prefix
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert "<question>" in prefix and "How do I pay?" not in prefix and "<document>" not in prefix
+    assert first[len(prefix):].startswith("<context>\n<document>")
+
 # --- Tests for ValidatedJsonOutputParser ---
 
 def test_validated_json_parser_valid_json():
@@ -83,3 +142,99 @@ def test_validated_json_parser_with_extra_text():
         'Sure, here is the JSON you requested:\n'
     ]
 
+
+
+# --- Tests for NoAnswerGate ---
+
+@component
+class FakeTextEmbedder:
+    def __init__(self, model=None):
+        pass
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str):
+        return {"embedding": [0.1, 0.2]}
+
+@component
+class FakeRetriever:
+    def __init__(self, documents, top_score):
+        self.documents = documents
+        self.top_score = top_score
+
+    @component.output_types(documents=List[Document], top_score=Optional[float])
+    def run(self, query_embedding: List[float], query: Optional[str] = None, top_k: Optional[int] = None):
+        return {"documents": self.documents[:top_k], "top_score": self.top_score}
+
+@component
+class FakeGenerator:
+    calls = 0
+
+    def __init__(self, model=None):
+        pass
+
+    @component.output_types(replies=List[str])
+    def run(self, prompt: str):
+        FakeGenerator.calls += 1
+        return {"replies": ['{"answer": "From the LLM.", "references": ["Doc"]}']}
+
+def build_fake_rag_pipeline(top_score, threshold=0.0):
+    FakeGenerator.calls = 0
+    documents = [Document(content="Some content.", meta={"title": "Doc"}, score=top_score)]
+    with patch("haystack_integrations.components.embedders.amazon_bedrock.AmazonBedrockTextEmbedder", FakeTextEmbedder), \
+         patch("haystack_integrations.components.generators.amazon_bedrock.AmazonBedrockGenerator", FakeGenerator), \
+         patch.object(pipelines, "build_hybrid_retriever", lambda store, top_k: FakeRetriever(documents, top_score)), \
+         patch.object(pipelines.config, "NO_ANSWER_SCORE_THRESHOLD", threshold):
+        return pipelines.build_rag_pipeline(document_store=None)
+
+def test_enabled_reranker_without_sentence_transformers_fails_at_build():
+    """
+    Tests that a missing sentence-transformers install is reported when the pipeline is built, not on the first query.
+    """
+    with patch.object(pipelines.config, "RERANKER_ENABLED", True), \
+         patch("src.reranking.importlib.util.find_spec", return_value=None):
+        with pytest.raises(ValueError, match="sentence-transformers"):
+            build_fake_rag_pipeline(top_score=0.8)
+
+def run_gated_pipeline(top_score, threshold):
+    rag_pipeline = build_fake_rag_pipeline(top_score, threshold)
+    return pipelines.extract_rag_result(rag_pipeline.run(pipelines.build_query_inputs("Where is the WePay setting?")))
+
+def test_gate_skips_the_llm_below_threshold(caplog):
+    """
+    Tests that a low top score returns the canonical no-answer response without calling the generator.
+    """
+    with caplog.at_level(logging.INFO, logger="src.pipelines"):
+        result = run_gated_pipeline(top_score=0.2, threshold=0.5)
+    assert result == {"answer": NO_ANSWER_MESSAGE, "references": []}
+    assert FakeGenerator.calls == 0
+    assert "decision=no_answer top_score=0.2000 threshold=0.5000" in caplog.text
+
+def test_gate_passes_relevant_context_to_the_llm():
+    """
+    Tests that a score above the threshold runs the full pipeline.
+    """
+    result = run_gated_pipeline(top_score=0.8, threshold=0.5)
+    assert result == {"answer": "From the LLM.", "references": ["Doc"]}
+    assert FakeGenerator.calls == 1
+
+def test_gate_blocks_empty_retrieval_even_when_disabled():
+    """
+    Tests that no documents always short-circuits, while a threshold of 0 otherwise lets everything through.
+    """
+    gate = NoAnswerGate(threshold=0.0)
+    assert gate.run(documents=[], top_score=None)["result"]["answer"] == NO_ANSWER_MESSAGE
+    documents = [Document(content="x", score=0.01)]
+    assert gate.run(documents=documents, top_score=0.01) == {"documents": documents}
+
+# --- Tests for warm-up ---
+
+def test_warm_up_embeds_and_retrieves_without_calling_the_llm():
+    """
+    Tests that warm-up primes the query cache and the retriever, reports per-step timings and never generates.
+    """
+    rag_pipeline = build_fake_rag_pipeline(top_score=0.9)
+    timings = pipelines.warm_up_rag_pipeline(rag_pipeline, query="Warm-up question")
+
+    assert set(timings) == {"components", "embedding", "retrieval"}
+    assert FakeGenerator.calls == 0
+    assert rag_pipeline.get_component("text_embedder").cache.get("Warm-up question") == [0.1, 0.2]
@@ -0,0 +1,99 @@
+# tests/test_reranking.py
+
+from unittest.mock import patch, MagicMock
+
+from haystack import Document
+
+from src import reranking
+from src.reranking import CrossEncoderReranker
+
+def make_docs(n):
+    return [Document(id=str(i), content=f"doc {i}", meta={"title": f"Title {i}"}) for i in range(n)]
+
+def fake_model(scores):
+    """A stand-in cross-encoder that scores each pair by the document's number."""
+    model = MagicMock()
+    model.predict.side_effect = lambda pairs, **kwargs: [scores[int(text.split()[-1])] for _, text in pairs]
+    return model
+
+def test_reranker_orders_by_cross_encoder_score():
+    """
+    Tests that candidates are scored in one batch and the best top_k are returned.
+    """
+    model = fake_model([0.1, 0.9, 0.5, 0.7])
+    with patch("src.reranking.load_cross_encoder", return_value=model):
+        result = CrossEncoderReranker("model", top_k=2, batch_size=32).run(documents=make_docs(4), query="q")["documents"]
+    assert [d.id for d in result] == ["1", "3"]
+    assert result[0].score == 0.9
+    assert model.predict.call_count == 1
+    assert model.predict.call_args.args[0][0] == ("q", "Title 0\ndoc 0")
+
+def slow_model(scores, seconds_per_batch, clock):
+    """A fake_model whose every predict call advances `clock["now"]` by `seconds_per_batch`."""
+    model = fake_model(scores)
+    predict = model.predict.side_effect
+    def timed_predict(pairs, **kwargs):
+        clock["now"] += seconds_per_batch
+        return predict(pairs, **kwargs)
+    model.predict.side_effect = timed_predict
+    return model
+
+def test_reranker_stops_scoring_when_budget_is_spent():
+    """
+    Tests that unscored candidates keep their retrieval order after the scored ones.
+    """
+    clock = {"now": 0.0}
+    model = slow_model([0.1, 0.2, 0.9, 0.8], 1.0, clock)
+    with patch("src.reranking.load_cross_encoder", return_value=model), \
+         patch("src.reranking.time.perf_counter", side_effect=lambda: clock["now"]):
+        result = CrossEncoderReranker("model", top_k=4, batch_size=2, max_latency_ms=100).run(documents=make_docs(4), query="q")["documents"]
+    assert [d.id for d in result] == ["1", "0", "2", "3"]
+    assert model.predict.call_count == 1
+
+def test_reranker_skips_a_batch_that_would_overrun_the_budget():
+    """
+    Tests that with smaller batches the budget cuts 30 candidates short before the batch that would overrun it.
+    """
+    clock = {"now": 0.0}
+    model = slow_model(list(range(30)), 0.15, clock)
+    reranker = CrossEncoderReranker("model", top_k=30, batch_size=8, max_latency_ms=500)
+    with patch("src.reranking.load_cross_encoder", return_value=model), \
+         patch("src.reranking.time.perf_counter", side_effect=lambda: clock["now"]):
+        result = reranker.run(documents=make_docs(30), query="q")["documents"]
+    assert model.predict.call_count == 3
+    assert clock["now"] <= 0.5
+    assert [d.id for d in result[:2]] == ["23", "22"]
+    assert [d.id for d in result[24:]] == [str(i) for i in range(24, 30)]
+
+def test_default_batch_size_scores_all_candidates_in_one_pass():
+    """
+    Tests that with the default settings all candidates are scored in a single forward pass.
+    """
+    from src import config
+    model = fake_model(list(range(config.RERANK_CANDIDATES)))
+    reranker = CrossEncoderReranker("model", top_k=3, batch_size=config.RERANK_BATCH_SIZE, max_latency_ms=config.RERANK_MAX_LATENCY_MS)
+    with patch("src.reranking.load_cross_encoder", return_value=model):
+        reranker.run(documents=make_docs(config.RERANK_CANDIDATES), query="q")
+    assert model.predict.call_count == 1
+
+def test_reranker_without_model_only_truncates():
+    """
+    Tests that a disabled reranker passes the first top_k documents through without loading anything.
+    """
+    with patch("src.reranking.load_cross_encoder") as mock_load:
+        reranker = CrossEncoderReranker(None, top_k=2)
+        reranker.warm_up()
+        result = reranker.run(documents=make_docs(5), query="q")["documents"]
+    assert [d.id for d in result] == ["0", "1"]
+    mock_load.assert_not_called()
+
+def test_cross_encoder_is_loaded_once_per_process():
+    """
+    Tests that the model is cached after the first load.
+    """
+    fake_module = MagicMock()
+    with patch.dict("sys.modules", {"sentence_transformers": fake_module}), patch.dict(reranking._MODELS, clear=True):
+        first = reranking.load_cross_encoder("some/model")
+        second = reranking.load_cross_encoder("some/model")
+    assert first is second
+    fake_module.CrossEncoder.assert_called_once_with("some/model", device="cpu")
@@ -0,0 +1,206 @@
+# tests/test_retrievers.py
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from haystack import Document
+
+from src.keyword_index import BM25Index
+from src.retrievers import HybridRetriever, NumpyEmbeddingRetriever, NumpyVectorIndex, reciprocal_rank_fusion
+
+def make_corpus(n=50, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim))
+    documents = [
+        Document(id=str(i), content=f"doc {i}", meta={"category": "Billing" if i % 2 else "Sales"}, embedding=vectors[i].tolist())
+        for i in range(n)
+    ]
+    return documents, vectors
+
+def brute_force(vectors, query, k):
+    scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [str(i) for i in order], scores[order]
+
+def test_numpy_index_matches_brute_force_cosine():
+    """
+    Tests that top-k results and scores equal an exact cosine-similarity ranking.
+    """
+    documents, vectors = make_corpus()
+    query = np.random.default_rng(1).normal(size=16)
+    result = NumpyEmbeddingRetriever(NumpyVectorIndex(documents), top_k=5).run(query_embedding=query.tolist())["documents"]
+    expected_ids, expected_scores = brute_force(vectors, query, 5)
+    assert [d.id for d in result] == expected_ids
+    assert [d.score for d in result] == pytest.approx(expected_scores.tolist(), abs=1e-5)
+    assert all(d.embedding is None for d in result)
+
+def test_numpy_index_float16_keeps_ranking():
+    """
+    Tests that float16 storage halves memory and preserves the top result.
+    """
+    documents, vectors = make_corpus()
+    query = vectors[7] + 0.01
+    index16 = NumpyVectorIndex(documents, dtype="float16")
+    index32 = NumpyVectorIndex(documents)
+    assert index16.matrix.dtype == np.float16
+    assert index16.matrix.nbytes * 2 == index32.matrix.nbytes
+    assert index16.search(query.tolist(), 1)[0].id == "7"
+
+def test_numpy_index_applies_filters():
+    """
+    Tests that Haystack metadata filters restrict the candidates.
+    """
+    documents, _ = make_corpus()
+    filters = {"field": "meta.category", "operator": "==", "value": "Billing"}
+    result = NumpyVectorIndex(documents).search([1.0] * 16, top_k=100, filters=filters)
+    assert len(result) == 25
+    assert all(d.meta["category"] == "Billing" for d in result)
+
+def test_numpy_index_handles_empty_corpus_and_small_k():
+    """
+    Tests edge cases: no documents, and top_k larger than the corpus.
+    """
+    assert NumpyVectorIndex([], dimension=4).search([1.0, 0, 0, 0], top_k=3) == []
+    documents, _ = make_corpus(n=2)
+    assert len(NumpyVectorIndex(documents).search([1.0] * 16, top_k=10)) == 2
+
+def test_numpy_index_from_pinecone_reads_past_the_query_cap(fake_paged_index):
+    """
+    Tests that the fallback index pages a Pinecone store by ID instead of a query capped at 1,000 documents.
+    """
+    from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
+
+    documents, vectors = make_corpus(n=1200)
+    index = fake_paged_index([d.id for d in documents])
+    index.fetch.side_effect = lambda ids, namespace: SimpleNamespace(vectors={
+        i: SimpleNamespace(id=i, values=documents[int(i)].embedding, metadata={"content": documents[int(i)].content})
+        for i in ids
+    })
+    store = PineconeDocumentStore(index="test", dimension=16)
+    store._index = index
+
+    with patch.object(PineconeDocumentStore, "filter_documents") as filter_documents:
+        numpy_index = NumpyVectorIndex.from_document_store(store)
+    filter_documents.assert_not_called()
+    assert len(numpy_index) == 1200 and numpy_index.matrix.shape == (1200, 16)
+    query = np.random.default_rng(1).normal(size=16)
+    expected_ids, _ = brute_force(vectors, query, 5)
+    assert [d.id for d in numpy_index.search(query.tolist(), 5)] == expected_ids
+
+def test_build_retriever_selects_numpy_backend():
+    """
+    Tests that RETRIEVER_BACKEND=numpy swaps in the local retriever.
+    """
+    from src import pipelines
+    documents, _ = make_corpus(n=3)
+    store = MagicMock()
+    store.filter_documents.return_value = documents
+    with patch.object(pipelines.config, "RETRIEVER_BACKEND", "numpy"):
+        retriever = pipelines.build_retriever(store)
+    assert isinstance(retriever, NumpyEmbeddingRetriever)
+    assert len(retriever.index) == 3
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """
+    Tests that documents ranked by both lists come first and each ID appears once.
+    """
+    a, b, c = (Document(id=i, content=i) for i in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], top_k=3, k=60)
+    assert [d.id for d in fused] == ["b", "a", "c"]
+    assert fused[0].score == pytest.approx(2 / 62)
+
+def test_hybrid_retriever_adds_exact_keyword_matches():
+    """
+    Tests that a keyword-only match the dense retriever missed makes it into the fused results.
+    """
+    documents = [
+        Document(id="wepay", content="Set up WePay for card payments.", meta={"title": "WePay"}),
+        Document(id="cards", content="Accepting credit cards.", meta={"title": "Cards"}),
+        Document(id="other", content="Unrelated article.", meta={"title": "Other"}),
+    ]
+    dense = MagicMock()
+    dense.run.return_value = {"documents": [documents[1], documents[2]]}
+    retriever = HybridRetriever(dense, BM25Index.build(documents), documents, top_k=2, candidates=10)
+
+    result = retriever.run(query_embedding=[0.1], query="How do I connect WePay?")["documents"]
+    assert "wepay" in [d.id for d in result]
+    dense.run.assert_called_once_with(query_embedding=[0.1], filters=None, top_k=10)
+
+def test_hybrid_retriever_without_keyword_index_passes_through():
+    """
+    Tests that without a keyword index the dense results are returned unchanged.
+    """
+    documents, _ = make_corpus(n=3)
+    dense = MagicMock()
+    dense.run.return_value = {"documents": documents[:2]}
+    result = HybridRetriever(dense, None, [], top_k=2).run(query_embedding=[0.1], query="anything")["documents"]
+    assert result == documents[:2]
+    dense.run.assert_called_once_with(query_embedding=[0.1], filters=None, top_k=2)
+
+class BlockingIndex:
+    """Wraps a BM25Index so a search waits until the test releases it."""
+    def __init__(self, index):
+        self.index = index
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def search(self, *args):
+        self.started.set()
+        self.release.wait(5)
+        return self.index.search(*args)
+
+def test_reload_during_keyword_search_keeps_rows_and_documents_together():
+    """
+    Tests that a snapshot reload mid-search neither mixes the old index with the new documents nor fails.
+    """
+    from src import pipelines
+    old_documents = [Document(id=f"old-{i}", content=f"payments guide {i}") for i in range(3)]
+    new_documents = [Document(id="new-0", content="unrelated article")]
+    index = BlockingIndex(BM25Index.build(old_documents))
+    retriever = HybridRetriever(MagicMock(), index, old_documents)
+    rag_pipeline = MagicMock()
+    rag_pipeline.get_component.return_value = retriever
+    snapshot = SimpleNamespace(documents=new_documents, load_keyword_index=lambda: BM25Index.build(new_documents))
+
+    result = {}
+    search = threading.Thread(target=lambda: result.update(documents=retriever.keyword_search("payments", 3)))
+    search.start()
+    assert index.started.wait(5)
+    with patch.object(pipelines.config, "HYBRID_RETRIEVAL_ENABLED", True), \
+         patch.object(pipelines, "_load_snapshot", return_value=snapshot):
+        assert pipelines.reload_retriever_index(rag_pipeline)
+    index.release.set()
+    search.join(5)
+
+    assert sorted(d.id for d in result["documents"]) == ["old-0", "old-1", "old-2"]
+    assert [d.id for d in retriever.keyword_search("unrelated", 3)] == ["new-0"]
+
+def test_concurrent_queries_run_keyword_searches_in_parallel():
+    """
+    Tests that keyword searches of concurrent queries overlap instead of queuing on one worker.
+    """
+    documents = [Document(id=str(i), content=f"payments guide {i}") for i in range(3)]
+    both_searching = threading.Barrier(2, timeout=5)
+
+    class MeetingIndex:
+        def __init__(self, index):
+            self.index = index
+
+        def search(self, *args):
+            both_searching.wait()  # raises BrokenBarrierError if the searches run one after the other
+            return self.index.search(*args)
+
+    dense = MagicMock()
+    dense.run.return_value = {"documents": []}
+    retriever = HybridRetriever(dense, MeetingIndex(BM25Index.build(documents)), documents, max_workers=2)
+    results = []
+    queries = [threading.Thread(target=lambda: results.append(retriever.run(query_embedding=[0.1], query="payments")))
+               for _ in range(2)]
+    for thread in queries:
+        thread.start()
+    for thread in queries:
+        thread.join(10)
+    assert len(results) == 2 and all(len(result["documents"]) == 3 for result in results)
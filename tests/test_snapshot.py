@@ -0,0 +1,221 @@
+# tests/test_snapshot.py
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import pytest
+from haystack import Document
+
+from src.manifest import IndexManifest
+from src.pipelines import index_documents
+from src.retrievers import NumpyVectorIndex
+from src.snapshot import CorpusSnapshot, SnapshotStaging, iter_store_documents, update_snapshot
+
+MODEL = "test-model"
+
+def make_doc(doc_id, embedding, content=None):
+    return Document(id=doc_id, content=content or f"content {doc_id}", meta={"article_id": doc_id}, embedding=embedding)
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    """
+    Tests that a written snapshot loads back normalized, in order and memory-mapped.
+    """
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, [make_doc("a", [3.0, 4.0]), make_doc("b", [0.0, 2.0])], MODEL, 2)
+
+    snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert snapshot.generation == 1
+    assert [d.id for d in snapshot.documents] == ["a", "b"]
+    assert snapshot.documents[0].meta == {"article_id": "a"}
+    np.testing.assert_allclose(snapshot.embeddings, [[0.6, 0.8], [0.0, 1.0]], atol=1e-6)
+
+def test_snapshot_is_ignored_on_model_or_version_mismatch(tmp_path):
+    """
+    Tests that snapshots built for another model, dimension or format are not loaded.
+    """
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, [make_doc("a", [1.0, 0.0])], MODEL, 2)
+    assert CorpusSnapshot.load(path, model="other-model", dimension=2) is None
+    assert CorpusSnapshot.load(path, model=MODEL, dimension=3) is None
+
+    header = json.loads((path / "header.json").read_text())
+    header["format_version"] = 999
+    (path / "header.json").write_text(json.dumps(header))
+    assert CorpusSnapshot.load(path, model=MODEL, dimension=2) is None
+    assert CorpusSnapshot.load(tmp_path / "missing") is None
+
+def test_update_snapshot_merges_upserts_and_deletes(tmp_path):
+    """
+    Tests that an update replaces changed rows, appends new ones, drops deleted ones and bumps the generation.
+    """
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, [make_doc("a", [1.0, 0.0]), make_doc("b", [0.0, 1.0]), make_doc("c", [1.0, 1.0])], MODEL, 2)
+
+    update_snapshot(path, [make_doc("b", [1.0, 0.0], "b changed"), make_doc("d", [0.0, 1.0])], ["c"], MODEL, 2)
+
+    snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+    assert snapshot.generation == 2
+    assert [d.id for d in snapshot.documents] == ["a", "b", "d"]
+    assert snapshot.documents[1].content == "b changed"
+    np.testing.assert_allclose(snapshot.embeddings[1], [1.0, 0.0], atol=1e-6)
+    assert not (tmp_path / "snapshot.tmp").exists() and not (tmp_path / "snapshot.old").exists()
+
+def test_update_snapshot_bootstraps_from_document_store(tmp_path):
+    """
+    Tests that the first update builds the full snapshot from the document store, not just the changed documents.
+    """
+    document_store = MagicMock()
+    document_store.filter_documents.return_value = [make_doc("a", [1.0, 0.0]), make_doc("b", [0.0, 1.0])]
+    update_snapshot(tmp_path / "snapshot", [make_doc("b", [0.0, 1.0])], [], MODEL, 2, document_store)
+
+    snapshot = CorpusSnapshot.load(tmp_path / "snapshot", model=MODEL, dimension=2)
+    assert [d.id for d in snapshot.documents] == ["a", "b"]
+
+def test_update_snapshot_overlays_the_run_on_a_stale_store(tmp_path):
+    """
+    Tests that a rebuild keeps this run's documents even when the store does not return them yet.
+    """
+    document_store = MagicMock()
+    # Eventually consistent: "b" is still the old version and "c" is not visible yet.
+    document_store.filter_documents.return_value = [make_doc("a", [1.0, 0.0]), make_doc("b", [1.0, 0.0], "b old")]
+    upserted = [make_doc("b", [0.0, 1.0], "b new"), make_doc("c", [1.0, 1.0])]
+    update_snapshot(tmp_path / "snapshot", upserted, [], MODEL, 2, document_store, rebuild=True)
+
+    snapshot = CorpusSnapshot.load(tmp_path / "snapshot", model=MODEL, dimension=2)
+    assert [d.id for d in snapshot.documents] == ["a", "b", "c"]
+    assert snapshot.documents[1].content == "b new"
+
+def test_update_snapshot_from_a_complete_run_ignores_store_and_old_snapshot(tmp_path):
+    """
+    Tests that a full run's upserted documents alone make up the new snapshot.
+    """
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, [make_doc("stale", [1.0, 0.0])], MODEL, 2)
+    document_store = MagicMock()
+    update_snapshot(path, [make_doc("a", [1.0, 0.0]), make_doc("b", [0.0, 1.0])], [], MODEL, 2, document_store, complete=True)
+
+    document_store.filter_documents.assert_not_called()
+    snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+    assert [d.id for d in snapshot.documents] == ["a", "b"]
+    assert snapshot.generation == 2
+
+def test_update_snapshot_from_staging_replaces_rows_in_place(tmp_path):
+    """
+    Tests that staged batches are merged into the snapshot: the last staged version wins and keeps the old row's place.
+    """
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, [make_doc("a", [1.0, 0.0]), make_doc("b", [0.0, 1.0]), make_doc("c", [1.0, 1.0])], MODEL, 2)
+    with SnapshotStaging(path, 2) as staging:
+        staging.add([make_doc("b", [1.0, 0.0], "first"), make_doc("d", [0.0, 3.0]), make_doc("e", None)])
+        staging.add([make_doc("b", [3.0, 4.0], "second")])
+        assert staging.count == 3
+        update_snapshot(path, staging, ["a"], MODEL, 2)
+    assert not staging.directory.exists()
+
+    snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+    assert [d.id for d in snapshot.documents] == ["b", "c", "d"]
+    assert snapshot.documents[0].content == "second"
+    np.testing.assert_allclose(snapshot.embeddings, [[0.6, 0.8], [0.70710677, 0.70710677], [0.0, 1.0]], rtol=1e-6)
+    assert len(snapshot.load_keyword_index()) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["snapshot"]
+
+def test_iter_store_documents_pages_pinecone_by_id(fake_paged_index):
+    """
+    Tests that a Pinecone index is read through list/fetch pages, past the 1,000-document query cap.
+    """
+    from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
+
+    ids = [str(i) for i in range(1050)]
+    vectors = {i: SimpleNamespace(id=i, values=[float(i), 1.0], metadata={"content": f"text {i}", "article_id": 1.0})
+               for i in ids}
+    vectors["7"].values = [-10.0, -10.0]  # written without an embedding
+    index = fake_paged_index(ids)
+    index.fetch.side_effect = lambda ids, namespace: SimpleNamespace(vectors={i: vectors[i] for i in ids})
+    document_store = PineconeDocumentStore(index="test", dimension=2)
+    document_store._index = index
+
+    documents = [document for page in iter_store_documents(document_store) for document in page]
+    assert [d.id for d in documents] == ids
+    assert documents[1].content == "text 1" and documents[1].embedding == [1.0, 1.0]
+    assert documents[7].embedding is None
+    assert index.fetch.call_count == 11
+    index.list.assert_not_called()
+
+def test_index_from_snapshot_searches_without_copying(tmp_path):
+    """
+    Tests that a float32 index wraps the memory-mapped matrix and ranks like an index built from documents.
+    """
+    rng = np.random.default_rng(0)
+    documents = [make_doc(str(i), rng.normal(size=8).tolist()) for i in range(20)]
+    path = tmp_path / "snapshot"
+    CorpusSnapshot.write(path, documents, MODEL, 8)
+    snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=8)
+
+    index = NumpyVectorIndex.from_snapshot(snapshot)
+    assert index.matrix is snapshot.embeddings
+    query = rng.normal(size=8).tolist()
+    expected = NumpyVectorIndex(documents).search(query, 5)
+    result = index.search(query, 5)
+    assert [d.id for d in result] == [d.id for d in expected]
+    assert [d.score for d in result] == pytest.approx([d.score for d in expected], abs=1e-5)
+    assert NumpyVectorIndex.from_snapshot(snapshot, dtype="float16").matrix.dtype == np.float16
+
+def test_index_documents_updates_snapshot(tmp_path):
+    """
+    Tests that an indexing run merges the documents it embedded into the existing snapshot.
+    """
+    path = tmp_path / "snapshot"
+    embedded = [make_doc("1", [0.0, 1.0])]
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build, \
+         patch("src.pipelines.config.EMBEDDING_MODEL_ID", MODEL), patch("src.pipelines.config.EMBEDDING_DIMENSION", 2):
+        CorpusSnapshot.write(path, [make_doc("old", [1.0, 0.0])], MODEL, 2)
+        mock_build.return_value.run.return_value = {"embedder": {"documents": embedded}, "writer": {}}
+        manifest = IndexManifest.load(tmp_path / "manifest.json")
+        index_documents(MagicMock(), [Document(id="1", content="a", meta={"article_id": 1})], manifest=manifest, snapshot_path=path)
+        snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+
+    assert snapshot.generation == 2
+    assert [d.id for d in snapshot.documents] == ["old", "1"]
+
+def test_full_index_run_replaces_the_snapshot(tmp_path):
+    """
+    Tests that a forced run from scratch builds the snapshot from its own documents without reading the store.
+    """
+    path = tmp_path / "snapshot"
+    document_store = MagicMock()
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build, \
+         patch("src.pipelines.config.EMBEDDING_MODEL_ID", MODEL), patch("src.pipelines.config.EMBEDDING_DIMENSION", 2):
+        CorpusSnapshot.write(path, [make_doc("old", [1.0, 0.0])], MODEL, 2)
+        mock_build.return_value.run.return_value = {"embedder": {"documents": [make_doc("1", [0.0, 1.0])]}, "writer": {}}
+        manifest = IndexManifest.load(tmp_path / "manifest.json", force=True)
+        index_documents(document_store, [Document(id="1", content="a", meta={"article_id": 1})], manifest=manifest, snapshot_path=path)
+        snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+
+    document_store.filter_documents.assert_not_called()
+    assert [d.id for d in snapshot.documents] == ["1"]
+
+def test_index_documents_stages_batches_on_disk(tmp_path):
+    """
+    Tests that an indexing run stages each embedded batch instead of keeping it, and cleans up the staging area.
+    """
+    path = tmp_path / "snapshot"
+    batches = [[make_doc("1", [0.0, 1.0])], [make_doc("2", [1.0, 0.0])]]
+    added = []
+    original_add = SnapshotStaging.add
+    def add(staging, documents):
+        added.append([d.id for d in documents])
+        original_add(staging, documents)
+    with patch("src.pipelines.build_indexing_pipeline") as mock_build, patch.object(SnapshotStaging, "add", add), \
+         patch("src.pipelines.config.EMBEDDING_MODEL_ID", MODEL), patch("src.pipelines.config.EMBEDDING_DIMENSION", 2):
+        mock_build.return_value.run.side_effect = [{"embedder": {"documents": batch}, "writer": {}} for batch in batches]
+        manifest = IndexManifest.load(tmp_path / "manifest.json", force=True)
+        documents = [Document(id=str(i), content=f"text {i}", meta={"article_id": i}) for i in (1, 2)]
+        index_documents(MagicMock(), documents, batch_size=1, manifest=manifest, snapshot_path=path)
+        snapshot = CorpusSnapshot.load(path, model=MODEL, dimension=2)
+
+    assert added == [["1"], ["2"]]
+    assert [d.id for d in snapshot.documents] == ["1", "2"]
+    assert not any(p.name.startswith("snapshot.staging-") for p in tmp_path.iterdir())
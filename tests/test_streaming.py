@@ -0,0 +1,110 @@
+# tests/test_streaming.py
+
+import json
+from unittest.mock import MagicMock
+
+from haystack.dataclasses import StreamingChunk
+
+import pytest
+from pydantic import ValidationError
+
+from src.streaming import IncrementalJsonParser, StopGeneration, format_sse, stream_rag_answer
+
+REPLY = '{"answer": "Use the \\"Pay\\" tab \\u2013 then save \\ud83d\\ude00.\\nDone", "references": ["Payments", "A {braced} \\"title\\""]}'
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_parser_emits_answer_text_incrementally():
+    """
+    Tests that the answer is reassembled exactly from any chunking, including escapes and surrogate pairs split across chunks.
+    """
+    for size in (1, 2, 3, 7, len(REPLY)):
+        parser = IncrementalJsonParser()
+        text = "".join(parser.feed(chunk) for chunk in chunked(REPLY, size))
+        assert text == json.loads(REPLY)["answer"]
+        assert parser.complete
+        assert parser.result() == json.loads(REPLY)
+
+def test_parser_detects_completion_and_ignores_surrounding_text():
+    """
+    Tests that preamble is skipped, completion is detected at the closing brace and trailing text is ignored.
+    """
+    parser = IncrementalJsonParser()
+    assert parser.feed('Sure! Here is the JSON: {"references": [], "answer": "Hi') == "Hi"
+    assert not parser.complete
+    assert parser.feed('!"}  Hope this helps. {"answer": "ignored"}') == "!"
+    assert parser.complete
+    assert parser.result() == {"answer": "Hi!", "references": []}
+
+def test_parser_only_streams_the_top_level_answer():
+    """
+    Tests that an "answer" key nested in another value is not streamed.
+    """
+    parser = IncrementalJsonParser()
+    assert parser.feed('{"meta": {"answer": "nested"}, "answer": "top", "references": []}') == "top"
+
+def test_parser_validates_against_rag_response():
+    """
+    Tests that incomplete or schema-violating objects are rejected.
+    """
+    parser = IncrementalJsonParser()
+    parser.feed('{"answer": "no references"')
+    with pytest.raises(json.JSONDecodeError):
+        parser.result()
+    parser.feed("}")
+    with pytest.raises(ValidationError):
+        parser.result()
+
+def fake_pipeline(reply, result, sent=None):
+    """A pipeline whose generator streams `reply` through the callback before returning `result`."""
+    def run(data):
+        callback = data["llm"]["streaming_callback"]
+        for chunk in chunked(reply, 5):
+            if sent is not None:
+                sent.append(chunk)
+            callback(StreamingChunk(content=chunk))
+        return result
+    pipeline = MagicMock()
+    pipeline.run.side_effect = run
+    return pipeline
+
+def test_stream_rag_answer_emits_deltas_then_references_and_result():
+    """
+    Tests the event sequence: answer deltas as generated, then references and the validated result.
+    """
+    parsed = json.loads(REPLY)
+    events = list(stream_rag_answer(fake_pipeline(REPLY, {"parser": {"result": parsed}}), "How do I pay?"))
+
+    names = [name for name, _ in events]
+    assert names[-2:] == ["references", "result"]
+    assert set(names[:-2]) == {"answer"} and len(names) > 3
+    assert "".join(data["delta"] for name, data in events if name == "answer") == parsed["answer"]
+    assert events[-1][1] == parsed
+
+def test_stream_rag_answer_stops_generation_at_the_closing_brace():
+    """
+    Tests that generation is cut off once the object is complete and the parsed reply becomes the result.
+    """
+    sent = []
+    reply = '{"answer": "Short.", "references": []}' + " and then the model keeps talking" * 10
+    events = list(stream_rag_answer(fake_pipeline(reply, {"parser": {"result": None}}, sent), "q"))
+
+    assert "".join(sent).startswith('{"answer": "Short.", "references": []}')
+    assert len("".join(sent)) < 45
+    assert events[-1] == ("result", {"answer": "Short.", "references": []})
+
+def test_stream_rag_answer_reports_errors_without_details():
+    """
+    Tests that a failing pipeline ends the stream with a generic error event.
+    """
+    pipeline = MagicMock()
+    pipeline.run.side_effect = RuntimeError("Bedrock exploded")
+    events = list(stream_rag_answer(pipeline, "q"))
+    assert events == [("error", {"detail": "Sorry, an internal error occurred while processing your request."})]
+
+def test_format_sse():
+    """
+    Tests the Server-Sent Events wire format.
+    """
+    assert format_sse("answer", {"delta": "hé"}) == 'event: answer\ndata: {"delta": "hé"}\n\n'
@@ -3,7 +3,7 @@ import streamlit as st
 
 # Import core components from your src package
 from src import config
-from src.pipelines import build_rag_pipeline
+from src.pipelines import build_query_inputs, build_rag_pipeline, extract_rag_result
 from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
 
 @st.cache_resource
@@ -34,15 +34,10 @@ if prompt := st.chat_input("How can I change my account details?"):
         with st.spinner("Searching for answers..."):
             try:
                 # --- KEY CHANGE 1: Correctly pass the query to the prompt_engine ---
-                result = rag_pipeline.run(
-                    data={
-                        "text_embedder": {"text": prompt},
-                        "prompt_engine": {"query": prompt}
-                    }
-                )
+                result = rag_pipeline.run(build_query_inputs(prompt))
                 
                 # --- KEY CHANGE 2: Access the structured JSON output from the parser ---
-                parsed_result = result["parser"]["result"]
+                parsed_result = extract_rag_result(result)
                 answer = parsed_result.get("answer", "No answer found.")
                 references = parsed_result.get("references", [])
                 
@@ -0,0 +1,51 @@
+# utils/benchmark_cleaning.py
+# Compares serial and process-pool HTML cleaning on the full knowledge-base export.
+
+import sys
+import os
+import json
+import time
+from pathlib import Path
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.data_processor import process_json_data
+
+DATA_PATH = Path(project_root) / "data" / "final_4dcrm_articles_clean.json"
+WORKER_COUNTS = [1, 2, 4, os.cpu_count() or 1]
+CHUNK_SIZE = 16
+REPEATS = 3
+
+def time_processing(json_data, workers: int) -> float:
+    """Returns the best wall-clock time (seconds) over REPEATS runs."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        process_json_data(json_data, workers=workers, chunk_size=CHUNK_SIZE)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        json_data = json.load(f)
+
+    baseline = process_json_data(json_data, workers=1)
+    results = []
+    for workers in sorted(set(WORKER_COUNTS)):
+        # Sanity check: the parallel path must produce the exact same documents.
+        documents = process_json_data(json_data, workers=workers, chunk_size=CHUNK_SIZE)
+        assert [(d.id, d.content) for d in documents] == [(d.id, d.content) for d in baseline]
+        results.append((workers, time_processing(json_data, workers)))
+
+    serial_time = results[0][1]
+    print("\n--- HTML Cleaning Benchmark ---")
+    print(f"File: {DATA_PATH.name} | Documents: {len(baseline)} | CPUs: {os.cpu_count()} | Chunk size: {CHUNK_SIZE}")
+    print(f"{'workers':>8} {'best (s)':>10} {'speedup':>8}")
+    for workers, elapsed in results:
+        print(f"{workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# utils/benchmark_compression.py
+# Prompt size and answer coverage with and without extractive context
+# compression, for the rag_quality questions of data/evaluation_dataset.json.
+# Runs offline: the knowledge-base export is chunked like the indexer does and
+# the RETRIEVER_TOP_K chunks per question are picked with BM25 (a stand-in for
+# the dense retriever), then prompts are built by CustomPromptEngine.
+#
+# Answer coverage is the share of the ground truth's words (longer than three
+# letters) that still appear in the context; compression must not lower it.
+# Only the lexical scorer is measured, since the embedding scorer needs Bedrock.
+
+import sys
+import os
+import json
+from pathlib import Path
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src import config
+from src.chunking import DocumentChunker, approx_token_count
+from src.compression import ContextCompressor
+from src.data_processor import load_and_process_data
+from src.keyword_index import BM25Index, tokenize
+from src.pipelines import CustomPromptEngine
+
+DATA_PATH = Path(project_root) / "data" / "final_4dcrm_articles_clean.json"
+DATASET_PATH = Path(project_root) / "data" / "evaluation_dataset.json"
+KEEP_RATIOS = [0.6, 0.4, 0.3]
+
+def coverage(ground_truth: str, documents) -> float:
+    words = {word for word in tokenize(ground_truth) if len(word) > 3}
+    context = set(tokenize(" ".join(document.content or "" for document in documents)))
+    return len(words & context) / len(words) if words else 1.0
+
+def main():
+    chunks = list(DocumentChunker(config.CHUNK_SIZE_TOKENS, config.CHUNK_OVERLAP_TOKENS).iter_chunks(load_and_process_data(DATA_PATH)))
+    index = BM25Index.build(chunks)
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        questions = [item for item in json.load(f) if item.get("category") == "rag_quality"]
+    prompt_engine = CustomPromptEngine()
+    print(f"{len(questions)} questions, top {config.RETRIEVER_TOP_K} of {len(chunks)} chunks each.\n")
+
+    retrieved = [[chunks[row] for row, _ in index.search(item["question"], config.RETRIEVER_TOP_K)] for item in questions]
+    def measure(compressor):
+        context_tokens = prompt_tokens = covered = 0.0
+        for item, documents in zip(questions, retrieved):
+            if compressor is not None:
+                documents = compressor.run(documents=documents, query=item["question"])["documents"]
+            context_tokens += sum(approx_token_count(document.content or "") for document in documents)
+            prompt_tokens += approx_token_count(prompt_engine.run(query=item["question"], documents=documents)["prompt"])
+            covered += coverage(item["ground_truth"], documents)
+        n = len(questions)
+        return context_tokens / n, prompt_tokens / n, covered / n
+
+    base_context, base_prompt, base_coverage = measure(None)
+    print(f"{'uncompressed':>18}: {base_context:6.0f} context tokens, {base_prompt:6.0f} prompt tokens, coverage {base_coverage:.0%}")
+    for keep_ratio in KEEP_RATIOS:
+        compressor = ContextCompressor("lexical", keep_ratio=keep_ratio, min_sentences=config.COMPRESSION_MIN_SENTENCES)
+        context, prompt, covered = measure(compressor)
+        print(f"{f'lexical, keep {keep_ratio:.0%}':>18}: {context:6.0f} context tokens ({1 - context / base_context:.0%} fewer), "
+              f"{prompt:6.0f} prompt tokens ({1 - prompt / base_prompt:.0%} fewer), coverage {covered:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# utils/benchmark_embedding.py
+# Measures how bulk-indexing wall-clock time scales with the embedding
+# concurrency limit, using a local fake embedder with Bedrock-like latency.
+
+import sys
+import os
+import time
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from haystack import Document
+from src.concurrency import ConcurrentDocumentEmbedder
+
+DOCUMENT_COUNT = 200
+LATENCY_SECONDS = 0.05  # Roughly one Titan v2 round trip
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+
+class FakeBedrockEmbedder:
+    """Sleeps for LATENCY_SECONDS per request, like a serial HTTP call to Bedrock."""
+    def run(self, documents):
+        for document in documents:
+            time.sleep(LATENCY_SECONDS)
+            document.embedding = [0.0] * 8
+        return {"documents": documents}
+
+def main():
+    documents = [Document(id=str(i), content=f"Article number {i}") for i in range(DOCUMENT_COUNT)]
+
+    print("\n--- Concurrent Embedding Benchmark ---")
+    print(f"Documents: {DOCUMENT_COUNT} | Simulated latency: {LATENCY_SECONDS * 1000:.0f} ms/request")
+    print(f"{'concurrency':>12} {'wall (s)':>10} {'docs/s':>8} {'speedup':>8}")
+    baseline = None
+    for concurrency in CONCURRENCY_LEVELS:
+        embedder = ConcurrentDocumentEmbedder(FakeBedrockEmbedder(), max_concurrency=concurrency)
+        start = time.perf_counter()
+        result = embedder.run(documents=documents)["documents"]
+        elapsed = time.perf_counter() - start
+        assert [d.id for d in result] == [d.id for d in documents]
+        baseline = baseline or elapsed
+        print(f"{concurrency:>12} {elapsed:>10.2f} {DOCUMENT_COUNT / elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
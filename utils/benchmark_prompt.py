@@ -0,0 +1,86 @@
+# utils/benchmark_prompt.py
+# Micro-benchmark for prompt assembly in CustomPromptEngine with 3, 10 and 50
+# retrieved documents, compared against the previous per-call f-string and
+# `+=` concatenation approach. No network access is needed.
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from haystack import Document
+from src.pipelines import CustomPromptEngine
+
+DOCUMENT_COUNTS = [3, 10, 50]
+ITERATIONS = 2000
+QUERY = "How do I connect WePay to accept card payments?"
+
+def legacy_prompt(query, documents):
+    """The previous implementation: statics rebuilt per call, context grown with +=."""
+    system_prompt = f"{CustomPromptEngine.SYSTEM_PROMPT}"
+    deliberation_steps = f"{CustomPromptEngine.DELIBERATION_STEPS}"
+    context_block = "<context>\n"
+    for doc in documents:
+        context_block += "<document>\n"
+        context_block += f"  <title>{doc.meta.get('title', 'N/A')}</title>\n"
+        context_block += f"  <category>{doc.meta.get('category', 'N/A')}</category>\n"
+        context_block += f"  <folder>{doc.meta.get('folder', 'N/A')}</folder>\n"
+        context_block += f"  <tags>{', '.join(doc.meta.get('tags', []))}</tags>\n"
+        context_block += f"  <content>{doc.content}</content>\n"
+        context_block += "</document>\n"
+    context_block += "</context>"
+    return f"""
+{system_prompt}
+{deliberation_steps}
+{context_block}
+<|user|>
+<question>
+{query}
+</question>
+<|assistant|>
+"""
+
+def make_documents(count):
+    sentence = "Open Settings, choose Payments and follow the steps to link your provider account. "
+    return [
+        Document(
+            content=sentence * 12,
+            meta={"title": f"Article {i}", "category": "Billing", "folder": "Payments", "tags": ["payments", "wepay"]},
+        )
+        for i in range(count)
+    ]
+
+def time_calls(build):
+    latencies = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        build()
+        latencies.append(time.perf_counter() - start)
+    latencies_us = np.array(latencies) * 1e6
+    return np.percentile(latencies_us, 50), np.percentile(latencies_us, 99)
+
+def main():
+    engine = CustomPromptEngine()
+    print("\n--- Prompt Assembly Benchmark ---")
+    print(f"Iterations: {ITERATIONS} | Static prefix: {len(engine.static_prefix)} chars")
+    print(f"{'docs':>5} {'implementation':>15} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for count in DOCUMENT_COUNTS:
+        documents = make_documents(count)
+        prompt = engine.run(query=QUERY, documents=documents)["prompt"]
+        assert prompt == legacy_prompt(QUERY, documents), "prompt layout changed"
+        assert prompt.startswith(engine.static_prefix)
+        for name, build in [
+            ("legacy", lambda: legacy_prompt(QUERY, documents)),
+            ("precompiled", lambda: engine.run(query=QUERY, documents=documents)),
+        ]:
+            p50, p99 = time_calls(build)
+            print(f"{count:>5} {name:>15} {p50:>10.1f} {p99:>10.1f}")
+
+if __name__ == "__main__":
+    main()
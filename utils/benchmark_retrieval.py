@@ -0,0 +1,87 @@
+# utils/benchmark_retrieval.py
+# Compares p50/p99 retrieval latency of the in-process NumPy index against the
+# Pinecone retriever, and times the BM25 keyword index used by hybrid retrieval.
+# The local paths run on synthetic corpora of realistic sizes; the Pinecone
+# path only runs when PINECONE_API_KEY is configured.
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from haystack import Document
+from src import config
+from src.keyword_index import BM25Index
+from src.retrievers import NumpyEmbeddingRetriever, NumpyVectorIndex
+
+CORPUS_SIZES = [300, 3000, 10000]
+QUERY_COUNT = 500
+TOP_K = config.RETRIEVER_TOP_K
+
+def percentiles(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 99)
+
+def time_retriever(retriever, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.run(query_embedding=query)
+        latencies.append(time.perf_counter() - start)
+    return percentiles(latencies)
+
+def main():
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(QUERY_COUNT, config.EMBEDDING_DIMENSION)).tolist()
+
+    print("\n--- Retrieval Latency Benchmark ---")
+    print(f"Dimension: {config.EMBEDDING_DIMENSION} | Queries: {QUERY_COUNT} | top_k: {TOP_K}")
+    print(f"{'backend':>18} {'docs':>7} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for size in CORPUS_SIZES:
+        vectors = rng.normal(size=(size, config.EMBEDDING_DIMENSION))
+        documents = [Document(id=str(i), content=f"doc {i}", embedding=vectors[i].tolist()) for i in range(size)]
+        for dtype in ("float32", "float16"):
+            retriever = NumpyEmbeddingRetriever(NumpyVectorIndex(documents, dtype=dtype), top_k=TOP_K)
+            p50, p99 = time_retriever(retriever, queries)
+            print(f"{'numpy-' + dtype:>18} {size:>7} {p50:>10.3f} {p99:>10.3f}")
+
+    print(f"\n{'backend':>18} {'docs':>7} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    vocabulary = [f"term{i}" for i in range(5000)]
+    for size in CORPUS_SIZES:
+        words = rng.choice(vocabulary, size=(size, 200))
+        documents = [Document(id=str(i), content=" ".join(words[i])) for i in range(size)]
+        index = BM25Index.build(documents)
+        keyword_queries = [" ".join(rng.choice(vocabulary, size=5)) for _ in range(QUERY_COUNT)]
+        latencies = []
+        for query in keyword_queries:
+            start = time.perf_counter()
+            index.search(query, config.HYBRID_CANDIDATES)
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = percentiles(latencies)
+        print(f"{'bm25':>18} {size:>7} {p50:>10.3f} {p99:>10.3f}")
+
+    if not config.PINECONE_API_KEY:
+        print("\nPINECONE_API_KEY not set; skipping the Pinecone retriever.")
+        return
+
+    from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
+    from haystack_integrations.components.retrievers.pinecone import PineconeEmbeddingRetriever
+
+    document_store = PineconeDocumentStore(index=config.PINECONE_INDEX_NAME, dimension=config.EMBEDDING_DIMENSION)
+    pinecone_retriever = PineconeEmbeddingRetriever(document_store=document_store, top_k=TOP_K)
+    pinecone_queries = queries[:100]  # Network-bound; fewer queries keep the run short.
+    p50, p99 = time_retriever(pinecone_retriever, pinecone_queries)
+    print(f"{'pinecone':>18} {document_store.count_documents():>7} {p50:>10.3f} {p99:>10.3f}")
+
+    local_retriever = NumpyEmbeddingRetriever(NumpyVectorIndex.from_document_store(document_store), top_k=TOP_K)
+    p50, p99 = time_retriever(local_retriever, pinecone_queries)
+    print(f"{'numpy (same data)':>18} {len(local_retriever.index):>7} {p50:>10.3f} {p99:>10.3f}")
+
+if __name__ == "__main__":
+    main()
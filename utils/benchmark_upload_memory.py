@@ -0,0 +1,145 @@
+# utils/benchmark_upload_memory.py
+# Peak Python memory of an /update-articles indexing job for exports of
+# growing size, run end to end through `run_update_job` and `index_documents`:
+# incremental parse, manifest check, chunking, embedding, parallel writes and
+# the corpus snapshot update. Bedrock and Pinecone are replaced by a stub
+# embedder (random vectors of the configured dimension) and a stub store, so
+# no network access is needed. Uploads are synthesized from the knowledge-base
+# export. Each job is measured twice: with embedded batches staged on disk
+# (the current path) and with them also kept in a list until the snapshot
+# update (how the job used to hold them).
+
+import sys
+import os
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import numpy as np
+from haystack import Document, component
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+os.environ.setdefault("HAYSTACK_TELEMETRY_ENABLED", "False")
+
+import app as api
+from src import config
+from src import pipelines
+from src.jobs import IndexingJob
+from src.snapshot import SnapshotStaging
+
+DATA_PATH = Path(project_root) / "data" / "final_4dcrm_articles_clean.json"
+UPLOAD_SIZES_MB = [4, 16, 48]
+
+@component
+class StubEmbedder:
+    """Stands in for the Bedrock document embedder."""
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]):
+        for document in documents:
+            document.embedding = self.rng.random(config.EMBEDDING_DIMENSION, dtype=np.float32).tolist()
+        return {"documents": documents}
+
+class StubDocumentStore:
+    """Stands in for an empty Pinecone index; accepts writes and deletes without keeping them."""
+    def filter_documents(self, filters=None) -> List[Document]:
+        return []
+
+    def write_documents(self, documents, policy=None) -> int:
+        return len(documents)
+
+    def delete_documents(self, document_ids) -> None:
+        pass
+
+def write_export(path: Path, size_mb: int) -> None:
+    """Writes an export of roughly `size_mb` MB by repeating the real categories with fresh article IDs."""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    next_id = 1
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        while written < size_mb * 1024 * 1024:
+            for category in categories:
+                for folder in category.get("folders", []):
+                    for article in folder.get("articles", []):
+                        article["id"] = next_id
+                        next_id += 1
+                text = json.dumps(category)
+                f.write(("," if written else "") + text)
+                written += len(text) + 1
+        f.write("]")
+
+def run_job(upload_path: Path, directory: Path, keep_in_memory: bool):
+    """
+    Runs one update job on a copy of the upload with a fresh manifest and
+    snapshot. Returns (chunks indexed, peak MB while indexing batches, peak MB
+    while merging the snapshot, seconds).
+    """
+    job_path = directory / "job.json"
+    job_path.write_bytes(upload_path.read_bytes())
+    peaks = {}
+    kept = []
+    stage = SnapshotStaging.add
+    merge = pipelines.update_snapshot
+
+    def add(staging, documents):
+        if keep_in_memory:
+            kept.extend(documents)
+        stage(staging, documents)
+
+    def update_snapshot(*args, **kwargs):
+        peaks["indexing"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        result = merge(*args, **kwargs)
+        peaks["snapshot"] = tracemalloc.get_traced_memory()[1]
+        return result
+
+    with patch.object(pipelines, "build_document_embedder", lambda cache=None: StubEmbedder()), \
+         patch.object(pipelines, "update_snapshot", update_snapshot), patch.object(SnapshotStaging, "add", add), \
+         patch.object(config, "INDEX_MANIFEST_PATH", directory / "manifest.json"), \
+         patch.object(config, "SNAPSHOT_PATH", directory / "snapshot"), \
+         patch.object(api, "document_store", StubDocumentStore()), patch.object(api, "RAG_PIPELINE", None), \
+         open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = api.run_update_job(IndexingJob(), job_path, prune=False)
+        elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+    for path in [directory / "manifest.json", directory / "snapshot"]:
+        if path.is_dir():
+            for child in path.iterdir():
+                child.unlink()
+            path.rmdir()
+        elif path.exists():
+            path.unlink()
+    return result["documents_indexed"], peaks["indexing"] / (1024 * 1024), peaks["snapshot"] / (1024 * 1024), elapsed
+
+def main():
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"Stub embeddings: {config.EMBEDDING_DIMENSION} dims; batches of {config.INDEXING_BATCH_SIZE} chunks.\n")
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        for size_mb in UPLOAD_SIZES_MB:
+            path = directory / f"export_{size_mb}mb.json"
+            write_export(path, size_mb)
+            print(f"--- {path.stat().st_size / (1024 * 1024):.0f} MB upload ---")
+            for name, keep_in_memory in [("kept in memory", True), ("staged on disk", False)]:
+                count, indexing_mb, snapshot_mb, elapsed = run_job(path, directory, keep_in_memory)
+                print(f"{name:>15}: {count} chunks, peak {indexing_mb:7.1f} MB indexing, "
+                      f"{snapshot_mb:7.1f} MB snapshot update, {elapsed:.1f}s")
+            path.unlink()
+
+if __name__ == "__main__":
+    main()
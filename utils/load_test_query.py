@@ -0,0 +1,69 @@
+# utils/load_test_query.py
+# Load test for the /query endpoint against local stand-ins for Bedrock and
+# Pinecone: the pipeline is replaced by one that sleeps for a typical embedding,
+# retrieval and generation latency. Reports throughput for 1-16 concurrent
+# clients, with one query worker (how the API behaved when queries ran on the
+# event loop) and with QUERY_CONCURRENCY workers. No network access is needed.
+
+import sys
+import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import app as api
+from src import config
+
+CLIENT_COUNTS = [1, 2, 4, 8, 16]
+QUERIES_PER_CLIENT = 5
+# Seconds spent in each stand-in stage of a query.
+EMBED_LATENCY = 0.05
+RETRIEVE_LATENCY = 0.03
+GENERATE_LATENCY = 0.4
+
+class StandInPipeline:
+    """Blocks like the real pipeline does on its Bedrock and Pinecone calls."""
+    def run(self, data, include_outputs_from=None):
+        time.sleep(EMBED_LATENCY)
+        time.sleep(RETRIEVE_LATENCY)
+        time.sleep(GENERATE_LATENCY)
+        return {"parser": {"result": {"answer": "A stand-in answer.", "references": []}}}
+
+async def run_clients(client_count):
+    """Sends QUERIES_PER_CLIENT queries from each of `client_count` clients; returns queries per second."""
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        async def one_client(n):
+            for i in range(QUERIES_PER_CLIENT):
+                response = await client.post("/query", json={"query": f"Question {i} from client {n}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_client(n) for n in range(client_count)))
+        elapsed = time.perf_counter() - start
+    return client_count * QUERIES_PER_CLIENT / elapsed
+
+def main():
+    api.RAG_PIPELINE = StandInPipeline()
+    single_query = EMBED_LATENCY + RETRIEVE_LATENCY + GENERATE_LATENCY
+    print(f"Stand-in query latency: {single_query * 1000:.0f} ms; {QUERIES_PER_CLIENT} queries per client.\n")
+
+    for workers in sorted({1, config.QUERY_CONCURRENCY}):
+        api.QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        print(f"--- {workers} query worker(s) ---")
+        for client_count in CLIENT_COUNTS:
+            throughput = asyncio.run(run_clients(client_count))
+            print(f"{client_count:>3} clients: {throughput:6.2f} queries/s "
+                  f"({throughput * single_query:.1f}x a single worker's ideal)")
+        api.QUERY_EXECUTOR.shutdown()
+        print()
+
+if __name__ == "__main__":
+    main()
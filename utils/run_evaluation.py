@@ -13,7 +13,8 @@ sys.path.insert(0, project_root)
 
 # Import from our source package
 from src import config
-from src.pipelines import build_rag_pipeline
+from src.chunking import approx_token_count
+from src.pipelines import build_query_inputs, build_rag_pipeline, extract_rag_result
 
 def run_evaluation():
     """
@@ -37,6 +38,7 @@ def run_evaluation():
     
     quality_pass_count = 0
     injection_pass_count = 0
+    prompt_tokens = []
 
     # --- 3. Run RAG Quality Tests ---
     print(f"\n🔬 Running {len(quality_tests)} RAG Quality Tests...")
@@ -45,16 +47,13 @@ def run_evaluation():
         question = test["question"]
         expected_substring = test["ground_truth"]
         
-        # Run the pipeline
-        result = rag_pipeline.run(
-            data={
-                "text_embedder": {"text": question},
-                "prompt_engine": {"query": question}
-            }
-        )
+        # Run the pipeline, keeping the prompt so its size can be reported
+        result = rag_pipeline.run(build_query_inputs(question), include_outputs_from={"prompt_engine"})
+        if "prompt_engine" in result:
+            prompt_tokens.append(approx_token_count(result["prompt_engine"]["prompt"]))
         
         # Access the validated JSON output
-        pipeline_output = result["parser"]["result"]
+        pipeline_output = extract_rag_result(result)
         actual_answer = pipeline_output.get("answer", "")
 
         # A simple check for correctness
@@ -79,14 +78,9 @@ def run_evaluation():
         attack_prompt = test["question"]
         failure_condition = test["ground_truth"] # In these tests, ground_truth is the failure string
         
-        result = rag_pipeline.run(
-            data={
-                "text_embedder": {"text": attack_prompt},
-                "prompt_engine": {"query": attack_prompt}
-            }
-        )
+        result = rag_pipeline.run(build_query_inputs(attack_prompt))
         
-        pipeline_output = result["parser"]["result"]
+        pipeline_output = extract_rag_result(result)
         model_response = pipeline_output.get("answer", "")
         
         # Test passes if the failure condition is NOT met
@@ -109,7 +103,12 @@ def run_evaluation():
     print("\n\n--- RAG Performance and Security Report ---")
     
     print("\n--- RAG Quality Results ---")
-    print(f"PASSING: {quality_pass_count} / {len(quality_tests)}\n")
+    print(f"PASSING: {quality_pass_count} / {len(quality_tests)}")
+    if prompt_tokens:
+        # Compare runs with CONTEXT_COMPRESSION_ENABLED / CONTEXT_TOKEN_BUDGET on and off.
+        print(f"Average prompt size: {sum(prompt_tokens) / len(prompt_tokens):.0f} tokens "
+              f"(compression {'on' if config.CONTEXT_COMPRESSION_ENABLED else 'off'})")
+    print()
     for log in quality_results_log:
         print(log)
         print("--------------------")
@@ -1,8 +1,13 @@
 # utils/run_indexing.py
-# A dedicated script to force the re-embedding and overwriting of all documents.
+# A dedicated script to (re-)index the knowledge base into Pinecone.
+# By default only new or changed articles are embedded (see src/manifest.py);
+# pass --full to force the re-embedding and overwriting of all documents.
+# Progress is checkpointed per batch; after a crash, --resume continues the
+# interrupted run from its last committed batch.
 
 import sys
 import os
+import argparse
 
 # --- KEY CHANGE: Add the project's root directory to the Python path ---
 # This allows the script to find the 'src' package when run from the 'utils' folder.
@@ -12,14 +17,16 @@ sys.path.insert(0, project_root)
 
 from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
 from src import config
-from src.data_processor import load_and_process_data
-from src.pipelines import build_indexing_pipeline
+from src.checkpoint import IndexingCheckpoint
+from src.data_processor import stream_documents
+from src.manifest import IndexManifest
+from src.pipelines import index_documents
 
-def main():
+def main(full: bool = False, resume: bool = False):
     """
     This function initializes the document store, loads and processes data using the
     latest logic in data_processor.py, and runs the indexing pipeline to
-    overwrite the documents in Pinecone.
+    overwrite changed documents in Pinecone and delete ones that left the export.
     """
     print("Starting dedicated indexing and overwriting process...")
     
@@ -29,19 +36,46 @@ def main():
         dimension=config.EMBEDDING_DIMENSION
     )
     
-    # Step 2: Load and process data using your updated script
+    # Step 2: Stream documents from disk using the latest processing logic.
+    # Nothing is loaded up front; documents are parsed as the batches need them.
     print("Processing data with the latest logic...")
-    docs_to_index = load_and_process_data(config.DATA_FILE_PATH)
+    docs_to_index = stream_documents(config.DATA_FILE_PATH)
     
-    # Step 3: Build and run the indexing pipeline
+    # Step 3: Either continue an interrupted run or start a new checkpointed one.
+    checkpoint = IndexingCheckpoint.load(config.INDEXING_CHECKPOINT_PATH) if resume else None
+    if resume and checkpoint is None:
+        print("No interrupted run to resume. Starting a new run.")
+    if checkpoint is not None:
+        full = checkpoint.full
+        print(
+            f"Resuming run {checkpoint.run_id} after {checkpoint.batches_committed} committed batches "
+            f"({checkpoint.documents_written} documents)."
+        )
+        if checkpoint.source_changed():
+            print("Warning: the export changed since the interrupted run; changed articles will be re-embedded.")
+    else:
+        checkpoint = IndexingCheckpoint.start(config.INDEXING_CHECKPOINT_PATH, config.DATA_FILE_PATH, full)
+
+    # Step 4: Compare against the manifest of the last run.
+    # A forced manifest re-embeds everything not yet written by this run.
+    if full:
+        print("Full re-index requested. Ignoring the existing index manifest.")
+    manifest = IndexManifest.load(config.INDEX_MANIFEST_PATH, run_id=checkpoint.run_id, force=full)
+
+    # Step 5: Embed and write the changed documents in fixed-size batches
     # The 'overwrite' policy in your pipeline ensures existing documents with the same ID are replaced.
-    print("Building indexing pipeline...")
-    indexing_pipeline = build_indexing_pipeline(document_store)
+    print(f"Overwriting changed documents in Pinecone in batches of {config.INDEXING_BATCH_SIZE}...")
+    stats = index_documents(document_store, docs_to_index, manifest=manifest, delete_missing=True,
+                            checkpoint=checkpoint, snapshot_path=config.SNAPSHOT_PATH)
     
-    print(f"Overwriting {len(docs_to_index)} documents in Pinecone...")
-    indexing_pipeline.run({"embedder": {"documents": docs_to_index}})
-    
-    print("\n✅ Process complete. All documents have been re-embedded and overwritten.")
+    print(
+        f"\n✅ Process complete. {stats['indexed']} documents re-embedded and overwritten, "
+        f"{stats['skipped']} unchanged, {stats['deleted']} deleted."
+    )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index the knowledge base into Pinecone.")
+    parser.add_argument("--full", action="store_true", help="Re-embed every document, ignoring the index manifest.")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its last committed batch.")
+    args = parser.parse_args()
+    main(full=args.full, resume=args.resume)
\ No newline at end of file
@@ -0,0 +1,62 @@
+# utils/tune_no_answer_threshold.py
+# Runs the evaluation questions through embedding and retrieval only (no LLM)
+# and prints each question's top dense similarity, so NO_ANSWER_SCORE_THRESHOLD
+# can be set between the "no_answer" questions and the answerable ones.
+
+import sys
+import os
+import json
+from pathlib import Path
+
+from haystack import Pipeline
+from haystack_integrations.document_stores.pinecone import PineconeDocumentStore
+from haystack_integrations.components.embedders.amazon_bedrock import AmazonBedrockTextEmbedder
+
+# --- Add Project Root to the Path ---
+# This allows the script to find the 'src' package.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src import config
+from src.pipelines import build_hybrid_retriever
+
+ANSWERABLE_CATEGORIES = {"rag_quality", "specificity"}
+
+def best_threshold(scores):
+    """Picks the cut (midpoint between neighbouring scores) that classifies the most questions correctly."""
+    candidates = sorted({score for score, _ in scores})
+    cuts = [(a + b) / 2 for a, b in zip(candidates, candidates[1:])] or candidates
+    def correct(cut):
+        return sum((score < cut) == should_gate for score, should_gate in scores)
+    return max(cuts, key=correct), max(correct(cut) for cut in cuts)
+
+def main():
+    dataset_path = Path(project_root) / "data" / "evaluation_dataset.json"
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        evaluation_data = json.load(f)
+    labelled = [item for item in evaluation_data if item.get("category") in ANSWERABLE_CATEGORIES | {"no_answer"}]
+
+    document_store = PineconeDocumentStore(index=config.PINECONE_INDEX_NAME, dimension=config.EMBEDDING_DIMENSION)
+    pipeline = Pipeline()
+    pipeline.add_component("text_embedder", AmazonBedrockTextEmbedder(model=config.EMBEDDING_MODEL_ID))
+    pipeline.add_component("retriever", build_hybrid_retriever(document_store))
+    pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
+
+    print(f"\n{'category':>12} {'top score':>10}  question")
+    scores = []
+    for item in labelled:
+        result = pipeline.run({"text_embedder": {"text": item["question"]}, "retriever": {"query": item["question"]}})
+        top_score = result["retriever"]["top_score"]
+        top_score = top_score if top_score is not None else 0.0
+        scores.append((top_score, item["category"] == "no_answer"))
+        print(f"{item['category']:>12} {top_score:>10.4f}  {item['question']}")
+
+    if not scores:
+        print("No labelled questions found in the evaluation dataset.")
+        return
+    threshold, correct = best_threshold(scores)
+    print(f"\nSuggested NO_ANSWER_SCORE_THRESHOLD={threshold:.4f} "
+          f"({correct}/{len(scores)} questions gated correctly; current value {config.NO_ANSWER_SCORE_THRESHOLD}).")
+
+if __name__ == "__main__":
+    main()